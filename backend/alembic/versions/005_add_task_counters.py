@@ -0,0 +1,52 @@
+"""Add task counters for the stats summary
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATUSES = ['PENDING', 'IN_PROGRESS', 'DONE', 'CANCELLED']
+PRIORITIES = ['LOW', 'MEDIUM', 'HIGH', 'URGENT']
+
+def upgrade() -> None:
+    # Kept in step by the app when TASK_STATS_COUNTERS is on, and checked
+    # against the tasks table by its periodic reconciliation
+    op.create_table('task_counters',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Seed every counter from one pass over tasks. SHARE mode holds off task
+    # writes until the migration commits: one landing between the count and
+    # the insert would have no counter row to update yet, and be lost.
+    op.execute('LOCK TABLE tasks IN SHARE MODE')
+    counters = [('total', 'TRUE')]
+    counters += [(f'status:{s.lower()}', f"status = '{s}'") for s in STATUSES]
+    counters += [(f'priority:{p.lower()}', f"priority = '{p}'") for p in PRIORITIES]
+    columns = ', '.join(
+        f'count(*) FILTER (WHERE {condition}) AS c{i}'
+        for i, (_, condition) in enumerate(counters)
+    )
+    rows = ', '.join(f"('{name}', c{i})" for i, (name, _) in enumerate(counters))
+    op.execute(
+        'INSERT INTO task_counters (name, value) '
+        f'SELECT name, value FROM (SELECT {columns} FROM tasks) AS counts '
+        f'CROSS JOIN LATERAL (VALUES {rows}) AS counters (name, value)'
+    )
+    # The overdue count only looks at open tasks with a due date
+    op.create_index('ix_tasks_open_due_date', 'tasks', ['due_date'], unique=False, postgresql_where=sa.text("status <> 'DONE'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_open_due_date', table_name='tasks')
+    op.drop_table('task_counters')
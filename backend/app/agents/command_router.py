@@ -0,0 +1,188 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Callable, Tuple
+
+# Maps user phrasing to the status values accepted by the task tools
+STATUS_ALIASES = {
+    "done": "done",
+    "complete": "done",
+    "completed": "done",
+    "finished": "done",
+    "in progress": "in_progress",
+    "in-progress": "in_progress",
+    "started": "in_progress",
+    "pending": "pending",
+    "todo": "pending",
+    "to do": "pending",
+    "open": "pending",
+    "cancelled": "cancelled",
+    "canceled": "cancelled",
+}
+
+_STATUS = "|".join(
+    sorted((re.escape(alias) for alias in STATUS_ALIASES), key=len, reverse=True)
+)
+_PRIORITY = "low|medium|high|urgent"
+_LIST_VERB = r"(?:list|show|show me|get|display|what are)"
+_MINE = r"(?:all )?(?:of )?(?:my )?(?:the )?"
+
+ToolCall = Tuple[str, Dict[str, Any]]
+
+
+@dataclass
+class RoutedCommand:
+    """A structured command resolved to a single tool call."""
+
+    tool_name: str
+    args: Dict[str, Any]
+    confidence: float
+    rule: str = ""
+
+
+@dataclass
+class _Rule:
+    name: str
+    pattern: "re.Pattern[str]"
+    build: Callable[["re.Match[str]"], ToolCall]
+    confidence: float = 1.0
+
+
+def normalize_command(text: str) -> str:
+    """Lower-case, collapse whitespace and strip trailing punctuation."""
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.rstrip(".!?").strip()
+
+
+# Verbs that signal the user may want tasks changed
+_WRITE_INTENT = re.compile(
+    r"\b(?:create|add|new|make|delete|remove|update|change|set|mark|complete|"
+    r"finish|close|rename|move|cancel|assign|schedule|remind|edit|start|"
+    r"reopen|postpone|prioriti[sz]e)\b"
+)
+
+
+def looks_read_only(text: str) -> bool:
+    """
+    Conservative guess that a message only queries tasks.
+
+    Used to decide whether identical concurrent messages may share one agent
+    run; anything mentioning a write verb is treated as a potential write.
+    """
+    return _WRITE_INTENT.search(normalize_command(text)) is None
+
+
+def _status_update(match: "re.Match[str]") -> ToolCall:
+    status = STATUS_ALIASES[match["status"]]
+    return "update_task", {"task_identifier": match["id"], "status": status}
+
+
+def _complete(match: "re.Match[str]") -> ToolCall:
+    return "update_task", {"task_identifier": match["id"], "status": "done"}
+
+
+def _priority_update(match: "re.Match[str]") -> ToolCall:
+    return "update_task", {
+        "task_identifier": match["id"],
+        "priority": match["priority"],
+    }
+
+
+def _delete(match: "re.Match[str]") -> ToolCall:
+    return "delete_task", {"task_identifier": match["id"]}
+
+
+def _list(match: "re.Match[str]") -> ToolCall:
+    args: Dict[str, Any] = {}
+    if match["priority"]:
+        args["priority_filter"] = match["priority"]
+    if match["status"]:
+        args["status_filter"] = STATUS_ALIASES[match["status"]]
+    return "list_tasks", args
+
+
+def _overdue(match: "re.Match[str]") -> ToolCall:
+    args: Dict[str, Any] = {"overdue": True}
+    if match["priority"]:
+        args["priority"] = match["priority"]
+    return "filter_tasks", args
+
+
+DEFAULT_RULES: List[_Rule] = [
+    _Rule(
+        "status_update",
+        re.compile(
+            rf"^(?:please )?(?:mark|set|move) (?:task )?#?(?P<id>\d+)"
+            rf"(?: status)? (?:as |to )?(?P<status>{_STATUS})$"
+        ),
+        _status_update,
+    ),
+    _Rule(
+        "complete",
+        re.compile(
+            r"^(?:please )?(?:complete|finish|close) (?:task )?#?(?P<id>\d+)$"
+        ),
+        _complete,
+        confidence=0.95,
+    ),
+    _Rule(
+        "priority_update",
+        re.compile(
+            rf"^(?:please )?(?:set|change|make|mark) (?:the )?(?:priority of )?"
+            rf"(?:task )?#?(?P<id>\d+)(?: priority)? (?:to |as )?"
+            rf"(?P<priority>{_PRIORITY})(?: priority)?$"
+        ),
+        _priority_update,
+    ),
+    _Rule(
+        "delete",
+        re.compile(
+            r"^(?:please )?(?:delete|remove) (?:task )?(?:number )?#?(?P<id>\d+)$"
+        ),
+        _delete,
+    ),
+    _Rule(
+        "overdue",
+        re.compile(
+            rf"^(?:{_LIST_VERB} |what's |what is |which are )?{_MINE}"
+            rf"(?:(?P<priority>{_PRIORITY})(?: priority)? )?overdue(?: tasks?)?$"
+        ),
+        _overdue,
+        confidence=0.95,
+    ),
+    _Rule(
+        "list",
+        re.compile(
+            rf"^{_LIST_VERB} {_MINE}"
+            rf"(?:(?P<priority>{_PRIORITY})(?: priority)? )?"
+            rf"(?:(?P<status>{_STATUS}) )?tasks?$"
+        ),
+        _list,
+        confidence=0.95,
+    ),
+]
+
+
+@dataclass
+class CommandRouter:
+    """
+    Deterministic intent parser for structured task commands.
+
+    Each rule is an anchored pattern over the normalized input, so a match
+    means the whole message was understood. Commands that reference tasks by
+    title, carry extra clauses or use free-form dates fall through to the LLM.
+    """
+
+    min_confidence: float = 0.9
+    rules: List[_Rule] = field(default_factory=lambda: list(DEFAULT_RULES))
+
+    def route(self, text: str) -> Optional[RoutedCommand]:
+        normalized = normalize_command(text)
+        for rule in self.rules:
+            match = rule.pattern.match(normalized)
+            if not match:
+                continue
+            if rule.confidence < self.min_confidence:
+                continue
+            tool_name, args = rule.build(match)
+            return RoutedCommand(tool_name, args, rule.confidence, rule.name)
+        return None
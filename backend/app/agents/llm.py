@@ -0,0 +1,168 @@
+import asyncio
+import json
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.agents.tokens import estimate_message_tokens
+from app.core.config import settings
+
+# Prefix the agent uses for instructions sent as human messages
+SYSTEM_PREFIX = "System:"
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Offline chat model that replays scripted tool calls and replies.
+
+    Each script entry is ``{"match": <regex>, "tool_calls": [...], "reply": str}``.
+    The entry is chosen by matching the latest user message (first match
+    wins; an entry without ``match`` is the fallback). The first call of a
+    turn returns the entry's tool calls; once tool results are present, or if
+    the entry has no tool calls, it returns the reply. ``latency_ms`` is
+    added to every call and ``token_latency_ms`` between streamed chunks.
+    """
+
+    script: List[Dict[str, Any]]
+    latency_ms: float = 0.0
+    token_latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs: Any) -> "ScriptedChatModel":
+        with open(path) as f:
+            return cls(script=json.load(f), **kwargs)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScriptedChatModel":
+        # Tool calls come from the script, so the schemas are not needed
+        return self
+
+    @staticmethod
+    def _user_input_index(messages: List[BaseMessage]) -> int:
+        """Index of the latest user message (instructions excluded), or -1."""
+        for index in range(len(messages) - 1, -1, -1):
+            message = messages[index]
+            if isinstance(message, HumanMessage) and not str(
+                message.content
+            ).startswith(SYSTEM_PREFIX):
+                return index
+        return -1
+
+    def _select_entry(self, user_input: str) -> Dict[str, Any]:
+        fallback = {"reply": "I'm not sure how to help with that."}
+        for entry in self.script:
+            pattern = entry.get("match")
+            if pattern is None:
+                fallback = entry
+            elif re.search(pattern, user_input, re.IGNORECASE):
+                return entry
+        return fallback
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        user_index = self._user_input_index(messages)
+        user_input = str(messages[user_index].content) if user_index >= 0 else ""
+        entry = self._select_entry(user_input)
+        has_tool_results = any(
+            isinstance(m, ToolMessage) for m in messages[user_index + 1 :]
+        )
+
+        if entry.get("tool_calls") and not has_tool_results:
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": call["name"],
+                        "args": call.get("args", {}),
+                        "id": f"call_{uuid.uuid4().hex[:12]}",
+                    }
+                    for call in entry["tool_calls"]
+                ],
+            )
+        else:
+            message = AIMessage(content=entry.get("reply", ""))
+
+        input_tokens = estimate_message_tokens(messages)
+        output_tokens = estimate_message_tokens([message])
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return message
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency_ms / 1000)
+        message = self._respond(messages)
+        if message.tool_calls:
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content="", tool_calls=message.tool_calls)
+            )
+            return
+        words = re.findall(r"\S+\s*", message.content) or [""]
+        for index, word in enumerate(words):
+            if index:
+                await asyncio.sleep(self.token_latency_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+
+def create_chat_model() -> BaseChatModel:
+    """Build the chat model selected by ``settings.llm_provider``."""
+    if settings.llm_provider == "scripted":
+        if not settings.llm_script_path:
+            raise ValueError("LLM_SCRIPT_PATH is required for the scripted provider")
+        return ScriptedChatModel.from_file(
+            settings.llm_script_path,
+            latency_ms=settings.llm_scripted_latency_ms,
+            token_latency_ms=settings.llm_scripted_token_latency_ms,
+        )
+
+    if settings.llm_provider != "gemini":
+        raise ValueError(f"Unknown LLM provider: {settings.llm_provider}")
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=settings.llm_model,
+        temperature=0.1,
+        google_api_key=settings.gemini_api_key,
+    )
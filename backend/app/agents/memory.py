@@ -0,0 +1,172 @@
+import hashlib
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from app.agents.tokens import (
+    CHARS_PER_TOKEN,
+    estimate_message_tokens,
+    estimate_tokens,
+    message_text,
+)
+
+# Longest excerpt of a single message kept in the rolling summary
+SUMMARY_EXCERPT_CHARS = 200
+
+
+@dataclass
+class _Turn:
+    messages: List[BaseMessage]
+    tokens: int
+
+
+@dataclass
+class Conversation:
+    """Recent turns of one chat plus a rolling summary of older ones."""
+
+    turns: Deque[_Turn] = field(default_factory=deque)
+    summary: str = ""
+    tokens: int = 0
+
+    def context_messages(self) -> List[BaseMessage]:
+        """Messages to prepend to the next turn's graph state."""
+        context: List[BaseMessage] = []
+        if self.summary:
+            context.append(
+                HumanMessage(
+                    content=f"Summary of earlier conversation:\n{self.summary}"
+                )
+            )
+        for turn in self.turns:
+            context.extend(turn.messages)
+        return context
+
+    def fingerprint(self) -> str:
+        """Stable digest of the context; empty for a fresh conversation."""
+        if not self.summary and not self.turns:
+            return ""
+        digest = hashlib.sha1(self.summary.encode())
+        for turn in self.turns:
+            for message in turn.messages:
+                digest.update(message_text(message).encode())
+        return digest.hexdigest()
+
+
+def _excerpt(text: str) -> str:
+    text = " ".join(text.split())
+    if len(text) <= SUMMARY_EXCERPT_CHARS:
+        return text
+    return text[: SUMMARY_EXCERPT_CHARS - 3] + "..."
+
+
+def _request_and_reply(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """The user request and final assistant reply of a turn, without tool traffic."""
+    request = next((m for m in messages if isinstance(m, HumanMessage)), None)
+    reply = next(
+        (
+            m
+            for m in reversed(messages)
+            if isinstance(m, AIMessage) and not m.tool_calls and m.content
+        ),
+        None,
+    )
+    return [m for m in (request, reply) if m is not None]
+
+
+def summarize_turn(messages: List[BaseMessage]) -> str:
+    """One or two summary lines for a turn: the request and the final reply."""
+    lines = []
+    for message in _request_and_reply(messages):
+        role = "User" if isinstance(message, HumanMessage) else "Assistant"
+        lines.append(f"{role}: {_excerpt(message_text(message))}")
+    return "\n".join(lines)
+
+
+class ConversationStore:
+    """
+    Bounded per-connection conversation memory.
+
+    Holds at most ``max_conversations`` conversations (least recently used are
+    evicted). Each conversation keeps whole recent turns within
+    ``token_budget``; older turns are folded into a rolling extractive summary
+    capped at ``summary_token_budget`` so the prompt stays bounded.
+    """
+
+    def __init__(
+        self,
+        token_budget: int,
+        summary_token_budget: int,
+        max_conversations: int,
+    ):
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        self.max_conversations = max_conversations
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def get(self, conversation_id: str) -> Conversation:
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            conversation = Conversation()
+            self._conversations[conversation_id] = conversation
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+        else:
+            self._conversations.move_to_end(conversation_id)
+        return conversation
+
+    def peek(self, conversation_id: str) -> Optional[Conversation]:
+        return self._conversations.get(conversation_id)
+
+    def append_turn(self, conversation_id: str, messages: List[BaseMessage]) -> None:
+        conversation = self.get(conversation_id)
+        turn = _Turn(messages=list(messages), tokens=estimate_message_tokens(messages))
+        conversation.turns.append(turn)
+        conversation.tokens += turn.tokens
+        self._compact(conversation)
+
+    def drop(self, conversation_id: str) -> None:
+        self._conversations.pop(conversation_id, None)
+
+    def _compact(self, conversation: Conversation) -> None:
+        # Fold the oldest turns into the summary, keeping the latest turn whole
+        while conversation.tokens > self.token_budget and len(conversation.turns) > 1:
+            self._summarize_oldest(conversation)
+
+        if conversation.tokens > self.token_budget:
+            # A single oversized turn (e.g. a long listing): keep only the
+            # request and the reply, or just its summary if that is too big
+            latest = conversation.turns.pop()
+            conversation.tokens -= latest.tokens
+            slim = _request_and_reply(latest.messages)
+            slim_tokens = estimate_message_tokens(slim)
+            if slim_tokens <= self.token_budget:
+                conversation.turns.append(_Turn(messages=slim, tokens=slim_tokens))
+                conversation.tokens += slim_tokens
+            else:
+                self._add_to_summary(conversation, latest.messages)
+
+        if estimate_tokens(conversation.summary) > self.summary_token_budget:
+            # Drop the oldest summary lines first
+            max_chars = self.summary_token_budget * CHARS_PER_TOKEN
+            trimmed = conversation.summary[-max_chars:]
+            conversation.summary = trimmed.split("\n", 1)[-1]
+
+    def _summarize_oldest(self, conversation: Conversation) -> None:
+        oldest = conversation.turns.popleft()
+        conversation.tokens -= oldest.tokens
+        self._add_to_summary(conversation, oldest.messages)
+
+    @staticmethod
+    def _add_to_summary(
+        conversation: Conversation, messages: List[BaseMessage]
+    ) -> None:
+        lines = summarize_turn(messages)
+        if lines:
+            conversation.summary = (
+                f"{conversation.summary}\n{lines}" if conversation.summary else lines
+            )
@@ -0,0 +1,52 @@
+import hashlib
+import json
+from typing import Dict, Any, Optional
+
+from app.agents.command_router import normalize_command
+from app.core.cache import get_cache
+from app.tools.task_tools import READ_ONLY_TOOLS
+
+
+def is_read_only_result(result: Dict[str, Any]) -> bool:
+    """Whether a turn's result came only from read-only tools (or no tools)."""
+    return all(
+        timing.get("tool") in READ_ONLY_TOOLS
+        for timing in result.get("tool_timings", {}).values()
+    )
+
+
+class AgentResponseCache:
+    """
+    Cache of read-only agent replies.
+
+    Keys combine the normalized user input, the task-table version and, once
+    a conversation has history, a fingerprint of its context, so any write
+    makes every earlier entry unreachable and follow-ups are only shared
+    between identical contexts; the TTL bounds
+    staleness of time-dependent answers such as "what's overdue?".
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+
+    @staticmethod
+    def key(user_input: str, version: int, context: str = "") -> str:
+        digest = hashlib.sha1(
+            f"{context}:{normalize_command(user_input)}".encode()
+        ).hexdigest()
+        return f"agent:response:{version}:{digest}"
+
+    async def get(
+        self, user_input: str, version: int, context: str = ""
+    ) -> Optional[Dict[str, Any]]:
+        cached = await get_cache().get(self.key(user_input, version, context))
+        return json.loads(cached) if cached is not None else None
+
+    async def set(
+        self, user_input: str, version: int, result: Dict[str, Any], context: str = ""
+    ) -> None:
+        await get_cache().set(
+            self.key(user_input, version, context),
+            json.dumps(result, default=str),
+            self.ttl,
+        )
@@ -0,0 +1,137 @@
+from typing import Dict, Any, List, Optional
+from app.core.config import settings
+
+RESPONSE_MODES = ("llm", "template", "auto")
+
+
+def _format_due(due_date: Optional[str]) -> str:
+    return f", due {due_date[:10]}" if due_date else ""
+
+
+def _format_task_line(task: Dict[str, Any]) -> str:
+    status = (task.get("status") or "").replace("_", " ")
+    return (
+        f"- #{task.get('id')} {task.get('title')} "
+        f"({status}, {task.get('priority')} priority{_format_due(task.get('due_date'))})"
+    )
+
+
+def _render_task_list(result: Dict[str, Any]) -> str:
+    tasks: List[Dict[str, Any]] = result.get("tasks") or []
+    if not tasks:
+        return "No tasks found."
+    noun = "task" if len(tasks) == 1 else "tasks"
+    lines = [f"Found {len(tasks)} {noun}:"]
+    lines.extend(_format_task_line(task) for task in tasks)
+    if result.get("next_cursor"):
+        lines.append("More tasks are available.")
+    return "\n".join(lines)
+
+
+def _render_create(result: Dict[str, Any]) -> str:
+    task = result["task"]
+    return (
+        f"Created task #{task['id']} '{task['title']}' "
+        f"({task['priority']} priority{_format_due(task.get('due_date'))})."
+    )
+
+
+def _render_update(result: Dict[str, Any]) -> str:
+    task = result["task"]
+    status = task["status"].replace("_", " ")
+    return (
+        f"Updated task #{task['id']} '{task['title']}': now {status}, "
+        f"{task['priority']} priority{_format_due(task.get('due_date'))}."
+    )
+
+
+def _render_delete(result: Dict[str, Any]) -> str:
+    return f"{result['message']}."
+
+
+def _render_bulk(result: Dict[str, Any]) -> str:
+    tasks: List[Dict[str, Any]] = result.get("tasks") or []
+    lines = [f"{result['message']}."]
+    lines.extend(_format_task_line(task) for task in tasks)
+    return "\n".join(lines)
+
+
+def _render_bulk_delete(result: Dict[str, Any]) -> str:
+    titles = result.get("titles") or []
+    if not titles:
+        return "No matching tasks to delete."
+    return f"{result['message']}: " + ", ".join(f"'{t}'" for t in titles) + "."
+
+
+_RENDERERS = {
+    "create_task": _render_create,
+    "update_task": _render_update,
+    "delete_task": _render_delete,
+    "list_tasks": _render_task_list,
+    "filter_tasks": _render_task_list,
+    "bulk_create_tasks": _render_bulk,
+    "bulk_update_tasks": _render_bulk,
+    "bulk_delete_tasks": _render_bulk_delete,
+}
+
+
+def render_tool_result(tool_name: str, result: Dict[str, Any]) -> str:
+    """Render a user-facing reply for a single tool result without the LLM."""
+    if not result.get("success"):
+        return (
+            result.get("message")
+            or result.get("content")
+            or f"The {tool_name} operation failed."
+        )
+
+    renderer = _RENDERERS.get(tool_name)
+    if renderer is None:
+        return result.get("message", "Done.")
+    return renderer(result)
+
+
+def render_tool_results(
+    tool_names: Dict[str, str], tool_results: Dict[str, Dict[str, Any]]
+) -> str:
+    """Render one reply covering every tool result of a turn."""
+    return "\n\n".join(
+        render_tool_result(tool_names.get(call_id, ""), result)
+        for call_id, result in tool_results.items()
+    )
+
+
+def response_mode_for(tool_name: str) -> str:
+    """Response mode for a tool: its override, else the deployment default."""
+    mode = settings.agent_response_mode_overrides.get(
+        tool_name, settings.agent_response_mode
+    )
+    return mode if mode in RESPONSE_MODES else "llm"
+
+
+def needs_llm_response(
+    tool_names: Dict[str, str], tool_results: Dict[str, Dict[str, Any]]
+) -> bool:
+    """
+    Decide whether the final reply must be phrased by the LLM.
+
+    In ``auto`` mode the LLM is only used to summarise large result sets or to
+    explain errors; ``template`` always renders locally and ``llm`` always
+    asks the model.
+    """
+    if not tool_results:
+        return True
+
+    for call_id, result in tool_results.items():
+        tool_name = tool_names.get(call_id)
+        if tool_name not in _RENDERERS:
+            return True
+
+        mode = response_mode_for(tool_name)
+        if mode == "llm":
+            return True
+        if mode == "auto":
+            if not result.get("success"):
+                return True
+            if len(result.get("tasks") or []) > settings.agent_template_max_rows:
+                return True
+    return False
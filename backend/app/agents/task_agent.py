@@ -1,14 +1,53 @@
+import asyncio
 import logging
-from typing import Annotated, Dict, Any, List
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
+from contextlib import asynccontextmanager
+from typing import (
+    Annotated,
+    AsyncIterator,
+    Dict,
+    Any,
+    List,
+    Optional,
+    Callable,
+    Awaitable,
+    Tuple,
+)
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import message_chunk_to_message
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableConfig
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 
 # from langgraph.prebuilt import ToolNode  # Not needed with custom async tool execution
-from app.tools.task_tools import TASK_TOOLS
+from app.tools.task_tools import (
+    TASK_TOOLS,
+    TOOL_REGISTRY,
+    READ_ONLY_TOOLS,
+    SET_WRITE_TOOLS,
+)
+from app.agents.command_router import CommandRouter, RoutedCommand, looks_read_only
+from app.agents.response_renderer import (
+    render_tool_result,
+    render_tool_results,
+    needs_llm_response,
+)
+from app.agents.response_cache import AgentResponseCache, is_read_only_result
+from app.agents.memory import ConversationStore
+from app.agents.tokens import estimate_tokens, estimate_message_tokens
+from app.agents.tool_compaction import compact_tool_result
+from app.agents.llm import create_chat_model
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.singleflight import SingleFlight
+from app.core.task_version import get_task_version
+from app.core.tracing import tracer
+from app.db.unit_of_work import UnitOfWork, measure_session_wait, unit_of_work
+import inspect
 import json
+import threading
+import time
+import uuid
 from datetime import datetime
 
 # ----------------- Setup Logging -----------------
@@ -18,26 +57,142 @@ logging.basicConfig(
 )
 logger = logging.getLogger("TaskManagementAgent")
 
+# Global cap on in-flight LLM requests, shared by every agent instance
+_llm_semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+
 
 # ----------------- Agent State -------------------
+def _merge_timings(left: Dict[str, float], right: Dict[str, float]) -> Dict[str, float]:
+    return {**(left or {}), **(right or {})}
+
+
 class AgentState(dict):
     messages: Annotated[List, add_messages]
     user_input: str
     tool_results: Dict[str, Any]
+    tool_timings: Dict[str, Any]
+    node_timings: Annotated[Dict[str, float], _merge_timings]
     final_response: str
 
 
+def _timed_node(name: str, node: Callable) -> Callable:
+    """
+    Wrap a graph node to record its duration in ``node_timings``, metrics
+    and a trace span.
+    """
+    wants_config = "config" in inspect.signature(node).parameters
+
+    async def timed(state: AgentState, config: RunnableConfig) -> AgentState:
+        start = time.perf_counter()
+        with tracer.span(name):
+            update = await (node(state, config) if wants_config else node(state))
+        duration_ms = (time.perf_counter() - start) * 1000
+        metrics.observe(f"agent.node.{name}", duration_ms)
+        return {**update, "node_timings": {name: round(duration_ms, 3)}}
+
+    return timed
+
+
+def _record_llm_usage(prompt_messages: List, response: AIMessage) -> None:
+    """Attach token counts of an LLM call to the current span and metrics."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens") or estimate_message_tokens(
+        prompt_messages
+    )
+    completion_tokens = usage.get("output_tokens") or estimate_message_tokens(
+        [response]
+    )
+    tracer.annotate(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        tokens_estimated=not usage,
+    )
+    metrics.increment("agent.tokens.prompt", prompt_tokens)
+    metrics.increment("agent.tokens.completion", completion_tokens)
+
+
+# ----------------- Tool scheduling ---------------
+def _tool_calls_conflict(first: Dict[str, Any], second: Dict[str, Any]) -> bool:
+    """
+    Whether two tool calls must keep their relative order.
+
+    Reads never conflict with reads. List/filter reads see the whole table, so
+    they conflict with every write. Writes conflict when they may touch the
+    same task: equal numeric ids, any title-based identifier (which could
+    match any task, including one created in the same turn), or a bulk write
+    selected by filter.
+    """
+    first_writes = first["name"] not in READ_ONLY_TOOLS
+    second_writes = second["name"] not in READ_ONLY_TOOLS
+    if not (first_writes and second_writes):
+        return first_writes or second_writes
+    if first["name"] in SET_WRITE_TOOLS or second["name"] in SET_WRITE_TOOLS:
+        return True
+
+    first_id = str(first["args"].get("task_identifier") or "")
+    second_id = str(second["args"].get("task_identifier") or "")
+    by_title = (first_id and not first_id.isdigit()) or (
+        second_id and not second_id.isdigit()
+    )
+    if by_title:
+        return True
+    return bool(first_id) and first_id == second_id
+
+
+def mark_rolled_back(content: str) -> str:
+    """Turn a successful write result into a failure once its turn rolled back."""
+    try:
+        result = json.loads(content)
+    except json.JSONDecodeError:
+        return content
+    if not isinstance(result, dict) or not result.get("success"):
+        return content
+    result["success"] = False
+    result["message"] = (
+        "Not saved: another step of this request failed, so it was rolled back. "
+        + result.get("message", "")
+    ).strip()
+    return json.dumps(result, default=str)
+
+
+def write_failed(content: str) -> bool:
+    """Whether a write tool's result reports that it did not do the write."""
+    try:
+        result = json.loads(content)
+    except json.JSONDecodeError:
+        # "Error executing tool ..." / "Tool ... not found"
+        return True
+    return isinstance(result, dict) and result.get("success") is False
+
+
+def plan_tool_stages(tool_calls: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Group tool calls into stages that can each run concurrently.
+
+    A call is placed one stage after the latest earlier call it conflicts
+    with, so conflicting calls execute in the order the model emitted them.
+    """
+    stage_of: List[int] = []
+    for index, tool_call in enumerate(tool_calls):
+        stage = 0
+        for earlier in range(index):
+            if _tool_calls_conflict(tool_calls[earlier], tool_call):
+                stage = max(stage, stage_of[earlier] + 1)
+        stage_of.append(stage)
+
+    stages: List[List[Dict[str, Any]]] = [[] for _ in range(max(stage_of) + 1)]
+    for tool_call, stage in zip(tool_calls, stage_of):
+        stages[stage].append(tool_call)
+    return stages
+
+
 # ----------------- Agent -------------------------
 class TaskManagementAgent:
-    def __init__(self):
+    def __init__(self, llm: Optional[BaseChatModel] = None):
         logger.info("Initializing TaskManagementAgent...")
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-pro",
-            temperature=0.1,
-            google_api_key=settings.gemini_api_key,
-            # convert_system_message_to_human=True,
-        )
-        logger.info("LLM initialized with Gemini model.")
+        # Injected models (e.g. ScriptedChatModel) allow offline runs
+        self.llm = llm if llm is not None else create_chat_model()
+        logger.info(f"LLM initialized: {self.llm._llm_type}")
 
         # Bind tools
         self.llm_with_tools = self.llm.bind_tools(TASK_TOOLS)
@@ -46,15 +201,42 @@ class TaskManagementAgent:
         self.graph = self._build_graph()
         logger.info("Agent workflow graph built successfully.")
 
+        # Read-only replies keyed on input + task-table version
+        self.response_cache = (
+            AgentResponseCache(ttl=settings.agent_response_cache_ttl)
+            if settings.agent_response_cache_enabled
+            else None
+        )
+
+        # Per-connection conversation memory with a token budget
+        self.memory = (
+            ConversationStore(
+                token_budget=settings.agent_memory_token_budget,
+                summary_token_budget=settings.agent_memory_summary_tokens,
+                max_conversations=settings.agent_memory_max_conversations,
+            )
+            if settings.agent_memory_enabled
+            else None
+        )
+
+        # Coalesces identical in-flight read-only turns into one graph run
+        self.single_flight = SingleFlight() if settings.agent_coalesce_enabled else None
+
+        # Deterministic router for structured commands that skip the LLM
+        self.command_router = (
+            CommandRouter(min_confidence=settings.fast_path_min_confidence)
+            if settings.fast_path_enabled
+            else None
+        )
+
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph workflow for task management."""
 
-        def agent_node(state: AgentState) -> AgentState:
+        async def agent_node(state: AgentState, config: RunnableConfig) -> AgentState:
             logger.debug(f"[agent_node] Received state: {state}")
             user_input = state.get("user_input", "")
             messages = state.get("messages", [])
             logger.info(f"[agent_node] Processing user input: {user_input}")
-            from google import generativeai as genai
 
             # System prompt
             system_prompt = """You are an AI-powered task management assistant. You help users manage their tasks through natural language commands.
@@ -65,6 +247,9 @@ Your capabilities include:
 - Deleting tasks
 - Listing and filtering tasks
 - Searching through tasks
+- Creating, updating or deleting many tasks at once
+
+For commands that affect several tasks ("create tasks A, B and C", "mark all low priority tasks as cancelled", "delete everything that is done"), use a single bulk_create_tasks, bulk_update_tasks or bulk_delete_tasks call instead of one call per task.
 
 When users give you natural language commands, analyze their intent and use the appropriate tools to fulfill their requests. Always provide helpful, conversational responses.
 
@@ -74,6 +259,7 @@ For task creation:
 
 For task updates:
 - Allow users to identify tasks by ID or partial title match
+- If a title matches several tasks, the result lists candidates: ask which one (by ID) instead of guessing
 - Support status changes: "mark as done", "set to in progress", etc.
 - Handle priority updates and due date changes
 
@@ -82,6 +268,8 @@ For task queries:
 - Allow text search in titles and descriptions
 - Provide clear, organized task lists
 
+Use the earlier conversation to resolve references like "that one" or "the first task" instead of listing tasks again.
+
 Always be helpful and conversational. If a request is ambiguous, ask for clarification."""
 
             # Convert system message to human message for Gemini compatibility
@@ -93,13 +281,25 @@ Always be helpful and conversational. If a request is ambiguous, ask for clarifi
 
             logger.debug(f"[agent_node] Sending messages to LLM: {full_messages}")
 
-            response = self.llm_with_tools.invoke(full_messages)
-            logger.info(f"[agent_node] LLM response: {response}")
-
-            new_messages = messages + [HumanMessage(content=user_input), response]
-
+            # A direct answer (no tool calls) is the final reply unless the
+            # response mode has generate_response phrase it, so stream it
+            on_token = config.get("configurable", {}).get("on_token")
+            if settings.agent_response_mode == "llm":
+                on_token = None
+            async with _llm_semaphore:
+                if on_token:
+                    response = await self._stream_response(
+                        full_messages, on_token, llm=self.llm_with_tools
+                    )
+                else:
+                    response = await self.llm_with_tools.ainvoke(full_messages)
+            logger.debug(f"[agent_node] LLM response: {response}")
+            _record_llm_usage(full_messages, response)
+            tracer.annotate(tool_calls=len(response.tool_calls or []))
+
+            # add_messages appends these to the state; no full-list copy needed
             return {
-                "messages": new_messages,
+                "messages": [HumanMessage(content=user_input), response],
                 "user_input": user_input,
                 "tool_results": state.get("tool_results", {}),
                 "final_response": "",
@@ -119,79 +319,112 @@ Always be helpful and conversational. If a request is ambiguous, ask for clarifi
                     f"[execute_tools] Tool calls detected: {last_message.tool_calls}"
                 )
 
-                # Execute tools manually with async support
+                # Independent calls run concurrently; conflicting ones keep order
+                tool_calls = last_message.tool_calls
+                stages = plan_tool_stages(tool_calls)
+                tracer.annotate(tool_calls=len(tool_calls), stages=len(stages))
+                outcomes = {}
+                async with self._turn_unit_of_work() as uow:
+                    for stage, batch in enumerate(stages):
+                        results = await asyncio.gather(
+                            *(self._invoke_tool(tool_call) for tool_call in batch)
+                        )
+                        for tool_call, (content, *timings) in zip(batch, results):
+                            outcomes[tool_call["id"]] = (content, *timings, stage)
+                            if (
+                                uow is not None
+                                and tool_call["name"] not in READ_ONLY_TOOLS
+                                and write_failed(content)
+                            ):
+                                # A write that was refused (missing or ambiguous
+                                # task) fails the turn like one that raised
+                                uow.failed = True
+                    committed = uow is None or await uow.complete()
+                if not committed:
+                    # One step failed, so none of the turn's writes were kept
+                    metrics.increment("agent.turn.rolled_back")
+                    tracer.annotate(rolled_back=True)
+                    for tool_call in tool_calls:
+                        if tool_call["name"] not in READ_ONLY_TOOLS:
+                            content, *timings = outcomes[tool_call["id"]]
+                            outcomes[tool_call["id"]] = (
+                                mark_rolled_back(content),
+                                *timings,
+                            )
+
                 tool_messages = []
                 extracted_results = {}
-
-                for tool_call in last_message.tool_calls:
-                    tool_name = tool_call["name"]
-                    tool_args = tool_call["args"]
+                tool_timings = {}
+                raw_tokens = compact_tokens = 0
+                for tool_call in tool_calls:
                     tool_call_id = tool_call["id"]
-
-                    # Find the tool function
-                    tool_func = None
-                    for tool in TASK_TOOLS:
-                        if tool.name == tool_name:
-                            tool_func = tool
-                            break
-
-                    if tool_func:
-                        try:
-                            # Execute the async tool
-                            result = await tool_func.ainvoke(tool_args)
-
-                            # Create tool message
-                            from langchain_core.messages import ToolMessage
-
-                            tool_message = ToolMessage(
-                                content=result, tool_call_id=tool_call_id
-                            )
-                            tool_messages.append(tool_message)
-
-                            # Extract result for processing
-                            try:
-                                result_data = json.loads(result)
-                                extracted_results[tool_call_id] = result_data
-                            except json.JSONDecodeError:
-                                extracted_results[tool_call_id] = {"content": result}
-
-                        except Exception as e:
-                            error_msg = f"Error executing tool {tool_name}: {str(e)}"
-                            from langchain_core.messages import ToolMessage
-
-                            tool_message = ToolMessage(
-                                content=error_msg, tool_call_id=tool_call_id
-                            )
-                            tool_messages.append(tool_message)
-                            extracted_results[tool_call_id] = {"content": error_msg}
-                    else:
-                        error_msg = f"Tool {tool_name} not found"
-                        from langchain_core.messages import ToolMessage
-
-                        tool_message = ToolMessage(
-                            content=error_msg, tool_call_id=tool_call_id
+                    content, duration_ms, wait_ms, stage = outcomes[tool_call_id]
+                    try:
+                        extracted_results[tool_call_id] = json.loads(content)
+                        # The model gets a compact projection, the client the full rows
+                        prompt_content = compact_tool_result(
+                            extracted_results[tool_call_id],
+                            max_rows=settings.agent_tool_max_rows,
+                            max_description_chars=settings.agent_tool_description_chars,
                         )
-                        tool_messages.append(tool_message)
-                        extracted_results[tool_call_id] = {"content": error_msg}
-
-                logger.info(f"[execute_tools] Tool results: {extracted_results}")
-                updated_messages = messages + tool_messages
-
+                    except json.JSONDecodeError:
+                        extracted_results[tool_call_id] = {"content": content}
+                        prompt_content = content
+                    raw_tokens += estimate_tokens(content)
+                    compact_tokens += estimate_tokens(prompt_content)
+                    tool_messages.append(
+                        ToolMessage(content=prompt_content, tool_call_id=tool_call_id)
+                    )
+                    tool_timings[tool_call_id] = {
+                        "tool": tool_call["name"],
+                        "duration_ms": round(duration_ms, 3),
+                        # Part of duration_ms spent queued behind other calls
+                        # on the turn's shared session
+                        "session_wait_ms": round(wait_ms, 3),
+                        "stage": stage,
+                    }
+
+                logger.debug(f"[execute_tools] Tool results: {extracted_results}")
+                logger.info(f"[execute_tools] Tool timings: {tool_timings}")
+                logger.info(
+                    f"[execute_tools] Tool result tokens (est.): "
+                    f"{raw_tokens} raw, {compact_tokens} in prompt"
+                )
+                tracer.annotate(
+                    raw_result_tokens=raw_tokens, prompt_result_tokens=compact_tokens
+                )
+                metrics.increment("agent.tool_result_tokens.raw", raw_tokens)
+                metrics.increment("agent.tool_result_tokens.prompt", compact_tokens)
                 return {
-                    "messages": updated_messages,
+                    "messages": tool_messages,
                     "user_input": state.get("user_input", ""),
                     "tool_results": extracted_results,
+                    "tool_timings": tool_timings,
                     "final_response": "",
                 }
 
             logger.info("[execute_tools] No tool calls found.")
             return state
 
-        def generate_response(state: AgentState) -> AgentState:
+        async def generate_response(
+            state: AgentState, config: RunnableConfig
+        ) -> AgentState:
             logger.debug(f"[generate_response] State before response: {state}")
             messages = state.get("messages", [])
             tool_results = state.get("tool_results", {})
 
+            local_response = self._render_locally(messages, tool_results)
+            if local_response is not None:
+                metrics.increment("agent.response.template")
+                tracer.annotate(mode="template")
+                logger.info(f"[generate_response] Rendered locally: {local_response}")
+                return {
+                    "messages": [AIMessage(content=local_response)],
+                    "user_input": state.get("user_input", ""),
+                    "tool_results": tool_results,
+                    "final_response": local_response,
+                }
+
             response_prompt = """Based on the tool execution results, provide a helpful and conversational response to the user.
 
 Be specific about what was accomplished:
@@ -205,14 +438,27 @@ Keep the response natural and user-friendly while being informative."""
             response_messages = messages + [
                 HumanMessage(content=f"System: {response_prompt}")
             ]
-
-            final_ai_response = self.llm.invoke(response_messages)
-            logger.info(
+            prompt_tokens = estimate_message_tokens(response_messages)
+            logger.info(f"[generate_response] Prompt tokens (est.): {prompt_tokens}")
+            metrics.increment("agent.prompt_tokens.generate_response", prompt_tokens)
+
+            on_token = config.get("configurable", {}).get("on_token")
+            async with _llm_semaphore:
+                if on_token:
+                    final_ai_response = await self._stream_response(
+                        response_messages, on_token
+                    )
+                else:
+                    final_ai_response = await self.llm.ainvoke(response_messages)
+            metrics.increment("agent.response.llm")
+            tracer.annotate(mode="llm", streamed=bool(on_token))
+            _record_llm_usage(response_messages, final_ai_response)
+            logger.debug(
                 f"[generate_response] Final AI response: {final_ai_response.content}"
             )
 
             return {
-                "messages": messages + [final_ai_response],
+                "messages": [final_ai_response],
                 "user_input": state.get("user_input", ""),
                 "tool_results": tool_results,
                 "final_response": final_ai_response.content,
@@ -233,9 +479,11 @@ Keep the response natural and user-friendly while being informative."""
                 return "generate_response"
 
         workflow = StateGraph(AgentState)
-        workflow.add_node("agent", agent_node)
-        workflow.add_node("execute_tools", execute_tools)
-        workflow.add_node("generate_response", generate_response)
+        workflow.add_node("agent", _timed_node("agent", agent_node))
+        workflow.add_node("execute_tools", _timed_node("execute_tools", execute_tools))
+        workflow.add_node(
+            "generate_response", _timed_node("generate_response", generate_response)
+        )
         workflow.set_entry_point("agent")
         workflow.add_conditional_edges(
             "agent",
@@ -249,35 +497,341 @@ Keep the response natural and user-friendly while being informative."""
         workflow.add_edge("generate_response", END)
         return workflow.compile()
 
-    async def process_message(self, user_input: str) -> Dict[str, Any]:
+    @staticmethod
+    @asynccontextmanager
+    async def _turn_unit_of_work() -> AsyncIterator[Optional[UnitOfWork]]:
+        """The turn's shared session, or None when AGENT_TURN_TRANSACTION is off."""
+        if not settings.agent_turn_transaction:
+            yield None
+            return
+        async with unit_of_work(snapshot_reads=settings.agent_snapshot_reads) as uow:
+            yield uow
+
+    @staticmethod
+    async def _invoke_tool(tool_call: Dict[str, Any]) -> Tuple[str, float, float]:
+        """
+        Run one tool call, returning its content, its duration and how much
+        of that it spent waiting for the turn's shared session (both in ms).
+        """
+        tool_name = tool_call["name"]
+        tool_func = TOOL_REGISTRY.get(tool_name)
+        start = time.perf_counter()
+        with tracer.span(
+            "tool", tool=tool_name, tool_call_id=tool_call["id"]
+        ), measure_session_wait() as waits:
+            if tool_func is None:
+                content = f"Tool {tool_name} not found"
+            else:
+                try:
+                    content = await tool_func.ainvoke(tool_call["args"])
+                except Exception as e:
+                    content = f"Error executing tool {tool_name}: {str(e)}"
+                    tracer.annotate(error=type(e).__name__)
+        duration_ms = (time.perf_counter() - start) * 1000
+        metrics.observe(f"agent.tool.{tool_name}", duration_ms)
+        return content, duration_ms, sum(waits)
+
+    async def _stream_response(
+        self,
+        messages: List,
+        on_token: Callable[[str], Awaitable[None]],
+        llm: Optional[Runnable] = None,
+    ) -> AIMessage:
+        """
+        Stream an LLM reply, forwarding each token chunk to on_token until
+        the model starts a tool call (its text is then not the final reply).
+        """
+        response = None
+        async for chunk in (llm or self.llm).astream(messages):
+            response = chunk if response is None else response + chunk
+            if chunk.content and not response.tool_call_chunks:
+                await on_token(chunk.content)
+        if response is None:
+            return AIMessage(content="")
+        return message_chunk_to_message(response)
+
+    @staticmethod
+    def _render_locally(
+        messages: List, tool_results: Dict[str, Any]
+    ) -> Optional[str]:
+        """
+        Build the final reply without a second LLM call when possible.
+
+        Returns None when the response mode requires the LLM to phrase it.
+        """
+        last_message = messages[-1] if messages else None
+        if isinstance(last_message, AIMessage) and not last_message.tool_calls:
+            # The agent answered directly (e.g. a clarifying question)
+            if settings.agent_response_mode == "llm":
+                return None
+            return last_message.content or None
+
+        tool_names = {}
+        for message in reversed(messages):
+            if isinstance(message, AIMessage) and message.tool_calls:
+                tool_names = {call["id"]: call["name"] for call in message.tool_calls}
+                break
+
+        if needs_llm_response(tool_names, tool_results):
+            return None
+        return render_tool_results(tool_names, tool_results)
+
+    async def _run_fast_path(self, command: RoutedCommand) -> Dict[str, Any]:
+        """Execute a routed command directly and render a templated reply."""
+        logger.info(
+            f"[fast_path] {command.rule} -> {command.tool_name}({command.args})"
+        )
+        start = time.perf_counter()
+        with tracer.span("tool", tool=command.tool_name, rule=command.rule):
+            result = await TOOL_REGISTRY[command.tool_name].ainvoke(command.args)
+        duration_ms = (time.perf_counter() - start) * 1000
+        result_data = json.loads(result)
+        tool_call_id = f"fast_path_{uuid.uuid4().hex}"
+        return {
+            # A refused command (task not found, invalid value) is not a
+            # success, so its reply is neither cached nor remembered
+            "success": result_data.get("success", True),
+            "response": render_tool_result(command.tool_name, result_data),
+            "tool_results": {tool_call_id: result_data},
+            "tool_timings": {
+                tool_call_id: {
+                    "tool": command.tool_name,
+                    "duration_ms": round(duration_ms, 3),
+                    "stage": 0,
+                }
+            },
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+    async def process_message(
+        self,
+        user_input: str,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
+        conversation_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run one chat turn through the fast path or the agent graph.
+
+        When ``on_token`` is given, tokens of an LLM-generated final reply are
+        passed to it as they stream in; the returned dict still carries the
+        complete response. With a ``conversation_id`` the turn sees earlier
+        turns of that conversation and is recorded in its memory. Each turn
+        is recorded as a trace (see ``app.core.tracing``).
+        """
         logger.info(f"[process_message] Received input: {user_input}")
-        print(f"[process_message] Received input: {user_input}")
+        with tracer.trace(
+            "chat_turn", conversation_id=conversation_id, input=user_input[:200]
+        ) as trace:
+            try:
+                # Cancelling the turn (e.g. the client disconnected) or hitting
+                # the deadline cancels the LLM call or tool in progress; open
+                # DB transactions roll back when their sessions close
+                result = await asyncio.wait_for(
+                    self._process_turn(user_input, on_token, conversation_id),
+                    timeout=settings.agent_turn_timeout or None,
+                )
+            except asyncio.TimeoutError:
+                metrics.increment("agent.turn.timeout")
+                tracer.annotate_trace(timed_out=True)
+                logger.warning(
+                    f"[process_message] Turn exceeded {settings.agent_turn_timeout}s"
+                )
+                result = {
+                    "success": False,
+                    "response": "Sorry, that took too long to answer. Some changes may already have been saved, please check your tasks before retrying.",
+                    "tool_results": {},
+                    "timed_out": True,
+                    "timestamp": datetime.utcnow().isoformat(),
+                }
+            except asyncio.CancelledError:
+                metrics.increment("agent.turn.cancelled")
+                logger.info("[process_message] Turn cancelled")
+                raise
+            tracer.annotate_trace(success=result["success"])
+        if trace is not None:
+            logger.info(f"[process_message] {trace.summary()}")
+        return result
+
+    async def _process_turn(
+        self,
+        user_input: str,
+        on_token: Optional[Callable[[str], Awaitable[None]]],
+        conversation_id: Optional[str],
+    ) -> Dict[str, Any]:
+        conversation = (
+            self.memory.get(conversation_id)
+            if self.memory is not None and conversation_id
+            else None
+        )
+        history = conversation.context_messages() if conversation else []
+        # Any turn with history is keyed on it: an elliptical follow-up such
+        # as "and the high priority ones?" has no marker to detect it by.
+        # Opening turns share the empty key across conversations.
+        context_key = conversation.fingerprint() if conversation else ""
+
+        coalesce = self.single_flight is not None and looks_read_only(user_input)
+        version = None
+        if self.response_cache or coalesce:
+            version = await get_task_version()
+
+        if self.response_cache:
+            cached = await self.response_cache.get(user_input, version, context_key)
+            if cached is not None:
+                metrics.increment("agent.response_cache.hit")
+                tracer.annotate_trace(path="cache")
+                self._remember(conversation_id, user_input, cached["response"])
+                return {
+                    **cached,
+                    "cached": True,
+                    "timestamp": datetime.utcnow().isoformat(),
+                }
+            metrics.increment("agent.response_cache.miss")
+
+        if coalesce:
+            result, turn_messages = await self._process_coalesced(
+                user_input, on_token, history, version, context_key
+            )
+        else:
+            result, turn_messages = await self._process_uncached(
+                user_input, on_token, history
+            )
+
+        if conversation_id and result["success"]:
+            self._remember(
+                conversation_id, user_input, result["response"], turn_messages
+            )
+        if (
+            self.response_cache
+            and result["success"]
+            and is_read_only_result(result)
+            and not result.get("coalesced")
+        ):
+            await self.response_cache.set(user_input, version, result, context_key)
+        return result
+
+    async def _process_coalesced(
+        self,
+        user_input: str,
+        on_token: Optional[Callable[[str], Awaitable[None]]],
+        history: List,
+        version: int,
+        context_key: str,
+    ) -> Tuple[Dict[str, Any], List]:
+        """
+        Share one execution between identical concurrent read-only turns.
+
+        Only the leader streams tokens. If the shared run turned out to write
+        (the read-only guess was wrong), each waiter runs its own turn.
+        """
+        key = AgentResponseCache.key(user_input, version, context_key)
+        (result, turn_messages), shared = await self.single_flight.do(
+            key, lambda: self._process_uncached(user_input, on_token, history)
+        )
+        if not shared:
+            return result, turn_messages
+        if not is_read_only_result(result):
+            return await self._process_uncached(user_input, on_token, history)
+
+        metrics.increment("agent.coalesced")
+        tracer.annotate_trace(path="coalesced")
+        return {**result, "coalesced": True}, turn_messages
+
+    def _remember(
+        self,
+        conversation_id: Optional[str],
+        user_input: str,
+        response: str,
+        turn_messages: Optional[List] = None,
+    ) -> None:
+        """Record a completed turn in the conversation's memory."""
+        if self.memory is None or not conversation_id:
+            return
+        if not turn_messages:
+            turn_messages = [
+                HumanMessage(content=user_input),
+                AIMessage(content=response),
+            ]
+        self.memory.append_turn(conversation_id, turn_messages)
+
+    def end_conversation(self, conversation_id: str) -> None:
+        """Forget a conversation's memory (e.g. when its WebSocket closes)."""
+        if self.memory is not None:
+            self.memory.drop(conversation_id)
+
+    async def _process_uncached(
+        self,
+        user_input: str,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
+        history: Optional[List] = None,
+    ) -> Tuple[Dict[str, Any], List]:
+        """Run the turn; returns the result and the messages it produced."""
+        if self.command_router:
+            command = self.command_router.route(user_input)
+            if command:
+                metrics.increment("agent.fast_path.hit")
+                tracer.annotate_trace(path="fast_path")
+                try:
+                    return await self._run_fast_path(command), []
+                except Exception:
+                    logger.exception("Fast path failed, falling back to LLM")
+                    metrics.increment("agent.fast_path.error")
+            else:
+                metrics.increment("agent.fast_path.miss")
+
+        tracer.annotate_trace(path="graph")
+        history = history or []
         try:
             initial_state = {
-                "messages": [],
+                "messages": history,
                 "user_input": user_input,
                 "tool_results": {},
+                "tool_timings": {},
+                "node_timings": {},
                 "final_response": "",
             }
-            final_state = await self.graph.ainvoke(initial_state)
-            logger.info(f"[process_message] Final state: {final_state}")
+            final_state = await self.graph.ainvoke(
+                initial_state, config={"configurable": {"on_token": on_token}}
+            )
 
-            return {
+            result = {
                 "success": True,
                 "response": final_state.get("final_response", ""),
                 "tool_results": final_state.get("tool_results", {}),
+                "tool_timings": final_state.get("tool_timings", {}),
+                "node_timings": final_state.get("node_timings", {}),
                 "timestamp": datetime.utcnow().isoformat(),
             }
+            return result, final_state.get("messages", [])[len(history) :]
 
         except Exception as e:
             logger.exception("Error in process_message")
-            return {
+            result = {
                 "success": False,
                 "response": f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your request.",
                 "tool_results": {},
                 "timestamp": datetime.utcnow().isoformat(),
             }
+            return result, []
+
+
+# Global agent instance, built on first use so importing this module stays
+# cheap; construction loads the LLM client and compiles the graph
+_task_agent: Optional[TaskManagementAgent] = None
+_task_agent_lock = threading.Lock()
+
+
+def get_task_agent() -> TaskManagementAgent:
+    """Return the process-wide agent, constructing it on the first call."""
+    global _task_agent
+    if _task_agent is None:
+        with _task_agent_lock:
+            if _task_agent is None:
+                _task_agent = TaskManagementAgent()
+    return _task_agent
 
 
-# Global agent instance
-task_agent = TaskManagementAgent()
+def __getattr__(name: str) -> Any:
+    # Keeps ``from app.agents.task_agent import task_agent`` working
+    if name == "task_agent":
+        return get_task_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
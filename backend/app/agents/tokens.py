@@ -0,0 +1,30 @@
+from typing import Iterable
+
+from langchain_core.messages import BaseMessage
+
+# Rough characters-per-token ratio for English text with Gemini/GPT tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for budgeting; not an exact tokenizer count."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def message_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        text = content
+    else:
+        text = " ".join(
+            part if isinstance(part, str) else str(part.get("text", ""))
+            for part in content
+        )
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += " ".join(f"{call['name']}{call['args']}" for call in tool_calls)
+    return text
+
+
+def estimate_message_tokens(messages: Iterable[BaseMessage]) -> int:
+    return sum(estimate_tokens(message_text(message)) for message in messages)
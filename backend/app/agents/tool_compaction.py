@@ -0,0 +1,49 @@
+import json
+from typing import Dict, Any, Optional
+
+# Task fields the model needs to answer questions and address tasks
+COMPACT_TASK_FIELDS = ("id", "title", "status", "priority")
+
+
+def compact_task(task: Dict[str, Any], max_description_chars: int) -> Dict[str, Any]:
+    """Project a ``Task.to_dict()`` row onto the fields useful in a prompt."""
+    compact = {field: task.get(field) for field in COMPACT_TASK_FIELDS}
+    if task.get("due_date"):
+        compact["due"] = task["due_date"][:10]
+    description = task.get("description")
+    if description and max_description_chars > 0:
+        if len(description) > max_description_chars:
+            description = description[: max_description_chars - 3] + "..."
+        compact["description"] = description
+    return compact
+
+
+def compact_tool_result(
+    result: Dict[str, Any], max_rows: int, max_description_chars: int
+) -> str:
+    """
+    Encode a tool result for the ``ToolMessage`` sent back to the model.
+
+    Single tasks and task lists are projected with ``compact_task``; lists are
+    capped at ``max_rows`` with a ``more`` count for the rows left out. The
+    full result is still returned to the client as ``tool_results``.
+    """
+    compact = {
+        key: value
+        for key, value in result.items()
+        if key not in ("task", "tasks") and value is not None
+    }
+
+    task: Optional[Dict[str, Any]] = result.get("task")
+    if task:
+        compact["task"] = compact_task(task, max_description_chars)
+
+    tasks = result.get("tasks")
+    if tasks is not None:
+        compact["tasks"] = [
+            compact_task(row, max_description_chars) for row in tasks[:max_rows]
+        ]
+        if len(tasks) > max_rows:
+            compact["more"] = len(tasks) - max_rows
+
+    return json.dumps(compact, separators=(",", ":"))
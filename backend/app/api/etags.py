@@ -0,0 +1,105 @@
+import secrets
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from fastapi import Request, Response
+
+from app.core.cache import get_cache
+from app.core.metrics import metrics
+
+# The in-process version counter restarts at 0 with the process, so its
+# ETags carry a per-process prefix; with Redis the counter (and the ETags)
+# are shared by every worker, except while Redis is unreachable and the
+# cache counts in-process instead
+_process_epoch = secrets.token_hex(4)
+
+
+def _epoch() -> str:
+    return "r" if get_cache().counters_shared else _process_epoch
+
+
+def task_etag(version: int) -> str:
+    """
+    Strong ETag for a response computed from the tasks table alone.
+
+    Built from the task ``version`` (``get_task_version``), which every
+    committed write bumps, so checking it costs a counter read and no
+    query. Read the version before running the query: a write landing in
+    between then yields an older ETag (a needless 200 later), never a newer
+    one (a wrong 304).
+    """
+    return f'"{_epoch()}-{version}"'
+
+
+def stats_etag(etag: str, valid_until: Optional[datetime]) -> str:
+    """
+    ``task_etag`` for the stats summary, which also changes with time: it
+    holds until ``valid_until``, when the next open task becomes overdue.
+    """
+    if valid_until is None:
+        return f'{etag[:-1]}-never"'
+    if valid_until.tzinfo is None:
+        valid_until = valid_until.replace(tzinfo=timezone.utc)
+    return f'{etag[:-1]}-{int(valid_until.timestamp())}"'
+
+
+def _client_etags(request: Request) -> List[str]:
+    header = request.headers.get("if-none-match", "")
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
+
+def client_has(request: Request, etag: str, wildcard: bool = True) -> bool:
+    """
+    Whether the request's If-None-Match names ``etag``. ``*`` matches any
+    representation, so pass ``wildcard=False`` until the resource is known
+    to exist.
+    """
+    matches = (etag, "*") if wildcard else (etag,)
+    return any(tag in matches for tag in _client_etags(request))
+
+
+def precondition_failed(request: Request, etag: str) -> bool:
+    """
+    Whether the request's If-Match rules out ``etag``, i.e. the client's copy
+    is stale and its write must be refused with 412. If-Match uses the strong
+    comparison, so a weak tag never matches.
+
+    The ETag covers the whole table, so a write to any task fails the check;
+    and the version is read before the write runs, so a write landing in
+    between goes undetected. It guards against stale edits, not races.
+    """
+    header = request.headers.get("if-match")
+    if header is None:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" not in tags and etag not in tags
+
+
+def current_stats_etag(request: Request, etag: str) -> Optional[str]:
+    """The client's ``stats_etag`` of ``etag``, if it has not expired yet."""
+    prefix = f"{etag[:-1]}-"
+    for tag in _client_etags(request):
+        if tag.startswith(prefix) and tag.endswith('"'):
+            expiry = tag[len(prefix) : -1]
+            if expiry == "never" or (expiry.isdigit() and time.time() < int(expiry)):
+                return tag
+    return None
+
+
+def not_modified(etag: str) -> Response:
+    """304 for a client whose copy is current: no query, no serialisation."""
+    metrics.increment("api.not_modified")
+    response = Response(status_code=304)
+    set_etag(response, etag)
+    return response
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    # Clients may keep the response but must revalidate before reusing it
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers.update(etag_headers(etag))
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Response
+
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.singleflight import SingleFlight
+
+# What an endpoint computes on a miss: the JSON body, the headers to send
+# with it and, for a body that changes with time, how long it stays valid
+Computed = Tuple[str, Dict[str, str], Optional[float]]
+
+
+class ApiResponseCache:
+    """
+    Read-through cache of serialized REST responses.
+
+    Keys combine the endpoint, the task version and the request parameters,
+    so any write makes every earlier entry unreachable (as for
+    ``AgentResponseCache``); a hit skips the query and the Pydantic
+    serialisation. Concurrent misses of one key share a single computation.
+    Hits and misses are counted under ``api.cache.*`` and timed per
+    endpoint, so the saving is the gap between the two ``avg_ms``.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._flights = SingleFlight()
+
+    @staticmethod
+    def key(endpoint: str, version: int, params: Dict[str, Any]) -> str:
+        digest = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return f"api:{endpoint}:{version}:{digest}"
+
+    async def respond(
+        self,
+        endpoint: str,
+        version: int,
+        params: Dict[str, Any],
+        compute: Callable[[], Awaitable[Computed]],
+    ) -> Response:
+        if not settings.api_cache_enabled:
+            body, headers, _ = await compute()
+            return _json_response(body, headers)
+
+        start = time.perf_counter()
+        key = self.key(endpoint, version, params)
+        cached = await get_cache().get(key)
+        if cached is not None:
+            # Stored as "<headers JSON>\n<body>"; compact JSON has no newlines
+            headers, body = cached.split("\n", 1)
+            self._record(endpoint, "hit", start)
+            return _json_response(body, json.loads(headers))
+
+        async def compute_and_store() -> Tuple[str, Dict[str, str]]:
+            body, headers, valid_for = await compute()
+            ttl = self.ttl if valid_for is None else min(self.ttl, valid_for)
+            if ttl > 0:
+                await get_cache().set(key, f"{json.dumps(headers)}\n{body}", ttl)
+            return body, headers
+
+        (body, headers), _ = await self._flights.do(key, compute_and_store)
+        self._record(endpoint, "miss", start)
+        return _json_response(body, headers)
+
+    @staticmethod
+    def _record(endpoint: str, outcome: str, start: float) -> None:
+        metrics.increment(f"api.cache.{outcome}")
+        metrics.observe(
+            f"api.cache.{endpoint}.{outcome}", (time.perf_counter() - start) * 1000
+        )
+        hits, misses = metrics.get("api.cache.hit"), metrics.get("api.cache.miss")
+        metrics.set_gauge("api.cache.hit_ratio", hits / (hits + misses))
+
+
+def _json_response(body: str, headers: Dict[str, str]) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def json_body(content: Any) -> str:
+    """Serialise like FastAPI's JSONResponse."""
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    )
+
+
+api_response_cache = ApiResponseCache(ttl=settings.api_cache_ttl)
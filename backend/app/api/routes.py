@@ -1,66 +1,318 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import List, Optional
+from sqlalchemy import select, insert, delete
+from typing import List, Optional, Set
+from app.core.config import settings
+from app.api.etags import (
+    client_has, current_stats_etag, etag_headers, not_modified, precondition_failed,
+    stats_etag, task_etag
+)
+from app.api.export import EXPORT_MEDIA_TYPES, export_query, stream_export
+from app.api.response_cache import api_response_cache, json_body
 from app.db.database import get_async_session
+from app.db.pagination import (
+    MAX_PAGE_SIZE, InvalidCursor, newest_first_page, ranked_page, split_page, split_ranked_page
+)
+from app.db.search import detect_full_text_search, task_filters, text_search
+from app.db.task_stats import (
+    next_overdue_at, record_created, record_deleted, task_stats, update_tasks
+)
 from app.models.task import Task, TaskStatus, TaskPriority
-from app.models.schemas import TaskResponse, TaskCreate, TaskUpdate, AgentResponse
-from datetime import datetime
+from app.models.schemas import (
+    TaskResponse, TaskCreate, TaskUpdate, AgentResponse,
+    BulkTaskCreate, BulkTaskSelection, BulkTaskUpdate, BulkItemError, BulkTaskResponse
+)
+from app.core.task_version import commit_and_bump, get_task_version
+from datetime import datetime, timezone
 
 router = APIRouter()
 
+_task_list = TypeAdapter(List[TaskResponse])
+
+def _status_priority_filters(status: Optional[str], priority: Optional[str]) -> list:
+    """WHERE clauses for the ``status``/``priority`` query parameters."""
+    conditions = []
+    if status:
+        try:
+            conditions.append(Task.status == TaskStatus(status))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+
+    if priority:
+        try:
+            conditions.append(Task.priority == TaskPriority(priority))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid priority: {priority}")
+    return conditions
+
 @router.get("/tasks", response_model=List[TaskResponse])
 async def get_tasks(
+    request: Request,
     skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=100),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     priority: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
     db: AsyncSession = Depends(get_async_session)
 ):
-    """Get all tasks with optional filtering and pagination."""
-    query = select(Task)
+    """
+    Get tasks, newest first (most relevant first with ``search``), with
+    optional filtering.
 
-    # Apply filters
-    if status:
-        try:
-            status_enum = TaskStatus(status)
-            query = query.filter(Task.status == status_enum)
-        except ValueError:
-            raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+    Pages are fetched with ``cursor``: when more tasks follow, the response
+    carries an ``X-Next-Cursor`` header to pass back. ``skip`` (OFFSET) is
+    still accepted but gets slower the deeper the page. Responses carry an
+    ``ETag``; a matching ``If-None-Match`` gets a 304 without a query.
+    """
+    version = await get_task_version()
+    etag = task_etag(version)
+    if client_has(request, etag):
+        return not_modified(etag)
 
-    if priority:
+    async def compute():
+        # Apply filters
+        query = select(Task).filter(*_status_priority_filters(status, priority))
+
+        # Word-prefix search, most relevant first (full-text index on Postgres)
+        ranked = None
+        if search:
+            await detect_full_text_search(db)
+            ranked = text_search(search)
+            query = query.filter(ranked[0])
+
+        # Apply ordering and pagination
         try:
-            priority_enum = TaskPriority(priority)
-            query = query.filter(Task.priority == priority_enum)
-        except ValueError:
-            raise HTTPException(status_code=400, detail=f"Invalid priority: {priority}")
+            if ranked:
+                query = ranked_page(query, ranked[1], cursor, limit)
+            else:
+                query = newest_first_page(query, cursor, limit)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if skip and not cursor:
+            query = query.offset(skip)
 
+        result = await db.execute(query)
+        if ranked:
+            tasks, next_cursor = split_ranked_page(result.all(), limit)
+        else:
+            tasks, next_cursor = split_page(result.scalars().all(), limit)
+        headers = etag_headers(etag)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        content = _task_list.dump_json(_task_list.validate_python(tasks))
+        return content.decode(), headers, None
+
+    params = {
+        "skip": skip, "limit": limit, "cursor": cursor,
+        "status": status, "priority": priority, "search": search
+    }
+    return await api_response_cache.respond("tasks", version, params, compute)
+
+@router.get("/tasks/export")
+async def export_tasks(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = Query(None),
+    priority: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """
+    Export every task matching the ``get_tasks`` filters, in id order, as
+    NDJSON (one ``TaskResponse`` object per line) or CSV.
+
+    The body is streamed from a server-side cursor, so memory use does not
+    grow with the number of tasks.
+    """
+    conditions = _status_priority_filters(status, priority)
     if search:
-        search_pattern = f"%{search}%"
-        query = query.filter(
-            (Task.title.ilike(search_pattern)) |
-            (Task.description.ilike(search_pattern))
+        await detect_full_text_search(db)
+        conditions.append(text_search(search)[0])
+
+    return StreamingResponse(
+        stream_export(export_query(*conditions), format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'}
+    )
+
+def _check_batch_size(count: int):
+    if count > settings.api_bulk_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.api_bulk_max_items} tasks can be sent per request"
         )
 
-    # Apply ordering and pagination
-    query = query.order_by(Task.created_at.desc()).offset(skip).limit(limit)
+async def _bulk_conditions(selection: BulkTaskSelection, db: AsyncSession) -> list:
+    """WHERE clauses for the tasks chosen by ``ids`` and/or ``filter``."""
+    conditions = []
+    if selection.filter:
+        task_filter = selection.filter
+        if task_filter.search:
+            await detect_full_text_search(db)
+        conditions = task_filters(
+            task_filter.search,
+            task_filter.status.value if task_filter.status else None,
+            task_filter.priority.value if task_filter.priority else None,
+            task_filter.overdue
+        )
+    if selection.ids:
+        _check_batch_size(len(selection.ids))
+        conditions.append(Task.id.in_(selection.ids))
 
-    result = await db.execute(query)
-    tasks = result.scalars().all()
+    # Never touch every task because a filter was left out by mistake
+    if not conditions and not selection.all_tasks:
+        raise HTTPException(
+            status_code=400,
+            detail="Specify ids or a filter (or all_tasks) to choose the tasks"
+        )
+    return conditions
+
+def _unmatched_ids(ids: Optional[List[int]], found: Set[int]) -> List[BulkItemError]:
+    return [
+        BulkItemError(index=index, id=task_id, error="No matching task")
+        for index, task_id in enumerate(ids or [])
+        if task_id not in found
+    ]
+
+@router.post("/tasks/bulk", response_model=BulkTaskResponse)
+async def bulk_create_tasks(
+    payload: BulkTaskCreate,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """
+    Create many tasks with one multi-row INSERT and one commit.
 
-    return tasks
+    Each item takes the fields of ``POST /tasks``. Invalid items are listed
+    in ``errors`` by index and the rest are created, unless ``atomic`` is
+    set, in which case any invalid item rejects the batch with a 422.
+    """
+    _check_batch_size(len(payload.tasks))
+
+    rows, errors = [], []
+    for index, item in enumerate(payload.tasks):
+        try:
+            task_data = TaskCreate.model_validate(item)
+        except ValidationError as e:
+            message = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                for error in e.errors()
+            )
+            errors.append(BulkItemError(index=index, error=message))
+            continue
+        rows.append({
+            "title": task_data.title,
+            "description": task_data.description,
+            "status": task_data.status or TaskStatus.PENDING,
+            "priority": task_data.priority or TaskPriority.MEDIUM,
+            "due_date": task_data.due_date
+        })
+
+    if errors and payload.atomic:
+        raise HTTPException(status_code=422, detail=[error.model_dump() for error in errors])
+
+    created = []
+    if rows:
+        # render_nulls keeps rows with and without a due date in one statement
+        result = await db.scalars(
+            insert(Task).returning(Task).execution_options(render_nulls=True), rows
+        )
+        # RETURNING order is unspecified; ids follow the request order
+        created = sorted(result.all(), key=lambda task: task.id)
+        await record_created(db, created)
+        await commit_and_bump(db)
+
+    return {
+        "count": len(created),
+        "tasks": created,
+        "task_ids": [task.id for task in created],
+        "errors": errors
+    }
+
+@router.patch("/tasks/bulk", response_model=BulkTaskResponse)
+async def bulk_update_tasks(
+    payload: BulkTaskUpdate,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """
+    Apply the same ``changes`` to every task chosen by ``ids`` and/or
+    ``filter``, with one UPDATE ... RETURNING and one commit. Requested ids
+    that matched no task are listed in ``errors``.
+    """
+    changes = payload.changes.model_dump(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="No changes given")
+    conditions = await _bulk_conditions(payload, db)
+    changes["updated_at"] = datetime.utcnow()
+
+    updated = sorted(await update_tasks(db, conditions, changes), key=lambda task: task.id)
+    if updated:
+        await commit_and_bump(db)
+
+    task_ids = [task.id for task in updated]
+    return {
+        "count": len(updated),
+        "tasks": updated,
+        "task_ids": task_ids,
+        "errors": _unmatched_ids(payload.ids, set(task_ids))
+    }
+
+@router.delete("/tasks/bulk", response_model=BulkTaskResponse)
+async def bulk_delete_tasks(
+    payload: BulkTaskSelection,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """
+    Delete every task chosen by ``ids`` and/or ``filter`` with one
+    DELETE ... RETURNING and one commit. Requested ids that matched no task
+    are listed in ``errors``.
+    """
+    conditions = await _bulk_conditions(payload, db)
+
+    deleted = (await db.execute(
+        delete(Task)
+        .where(*conditions)
+        .returning(Task.id, Task.status, Task.priority)
+        .execution_options(synchronize_session=False)
+    )).all()
+    if deleted:
+        await record_deleted(db, deleted)
+        await commit_and_bump(db)
+
+    task_ids = sorted(row.id for row in deleted)
+    return {
+        "count": len(deleted),
+        "task_ids": task_ids,
+        "errors": _unmatched_ids(payload.ids, set(task_ids))
+    }
 
 @router.get("/tasks/{task_id}", response_model=TaskResponse)
-async def get_task(task_id: int, db: AsyncSession = Depends(get_async_session)):
-    """Get a specific task by ID."""
-    result = await db.execute(select(Task).filter(Task.id == task_id))
-    task = result.scalar_one_or_none()
+async def get_task(
+    task_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Get a specific task by ID (conditional on ``If-None-Match``)."""
+    version = await get_task_version()
+    etag = task_etag(version)
+    if client_has(request, etag, wildcard=False):
+        return not_modified(etag)
 
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
+    async def compute():
+        result = await db.execute(select(Task).filter(Task.id == task_id))
+        task = result.scalar_one_or_none()
 
-    return task
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        content = TaskResponse.model_validate(task).model_dump_json()
+        return content, etag_headers(etag), None
+
+    response = await api_response_cache.respond("task", version, {"id": task_id}, compute)
+    # A missing task raised a 404 above, so "*" can match now
+    if client_has(request, etag):
+        return not_modified(etag)
+    return response
 
 @router.post("/tasks", response_model=TaskResponse)
 async def create_task(
@@ -68,92 +320,101 @@ async def create_task(
     db: AsyncSession = Depends(get_async_session)
 ):
     """Create a new task."""
-    new_task = Task(
-        title=task_data.title,
-        description=task_data.description,
-        status=task_data.status,
-        priority=task_data.priority,
-        due_date=task_data.due_date
+    # INSERT ... RETURNING gives back the server defaults without a refresh
+    new_task = await db.scalar(
+        insert(Task).values(
+            title=task_data.title,
+            description=task_data.description,
+            status=task_data.status,
+            priority=task_data.priority,
+            due_date=task_data.due_date
+        ).returning(Task)
     )
-
-    db.add(new_task)
-    await db.commit()
-    await db.refresh(new_task)
+    await record_created(db, [new_task])
+    await commit_and_bump(db)
 
     return new_task
 
+def _check_if_match(request: Request, version: int):
+    if precondition_failed(request, task_etag(version)):
+        raise HTTPException(
+            status_code=412,
+            detail="The task changed since it was fetched; reload it and retry"
+        )
+
 @router.put("/tasks/{task_id}", response_model=TaskResponse)
 async def update_task(
     task_id: int,
     task_update: TaskUpdate,
+    request: Request,
     db: AsyncSession = Depends(get_async_session)
 ):
-    """Update an existing task."""
-    result = await db.execute(select(Task).filter(Task.id == task_id))
-    task = result.scalar_one_or_none()
-
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    # Update fields
+    """Update an existing task (conditional on ``If-Match``)."""
+    _check_if_match(request, await get_task_version())
     update_data = task_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(task, field, value)
+    update_data["updated_at"] = datetime.utcnow()
 
-    task.updated_at = datetime.utcnow()
+    # One UPDATE ... RETURNING; no row back means there was no such task
+    tasks = await update_tasks(db, [Task.id == task_id], update_data)
 
-    await db.commit()
-    await db.refresh(task)
+    if not tasks:
+        raise HTTPException(status_code=404, detail="Task not found")
+    task = tasks[0]
+
+    await commit_and_bump(db)
 
     return task
 
 @router.delete("/tasks/{task_id}")
-async def delete_task(task_id: int, db: AsyncSession = Depends(get_async_session)):
-    """Delete a task."""
-    result = await db.execute(select(Task).filter(Task.id == task_id))
-    task = result.scalar_one_or_none()
+async def delete_task(
+    task_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Delete a task (conditional on ``If-Match``)."""
+    _check_if_match(request, await get_task_version())
+    deleted = (await db.execute(
+        delete(Task)
+        .where(Task.id == task_id)
+        .returning(Task.title, Task.status, Task.priority)
+        .execution_options(synchronize_session=False)
+    )).one_or_none()
 
-    if not task:
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    await db.delete(task)
-    await db.commit()
+    await record_deleted(db, [deleted])
+    await commit_and_bump(db)
 
-    return {"message": f"Task '{task.title}' deleted successfully"}
+    return {"message": f"Task '{deleted.title}' deleted successfully"}
 
 @router.get("/tasks/stats/summary")
-async def get_task_stats(db: AsyncSession = Depends(get_async_session)):
-    """Get task statistics summary."""
-    # Total tasks
-    total_result = await db.execute(select(func.count(Task.id)))
-    total = total_result.scalar()
-
-    # Tasks by status
-    status_result = await db.execute(
-        select(Task.status, func.count(Task.id)).group_by(Task.status)
-    )
-    status_counts = {status.value: count for status, count in status_result.all()}
+async def get_task_stats(
+    request: Request,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """
+    Get task statistics summary: one aggregate query, or the maintained
+    counters with TASK_STATS_COUNTERS. Conditional on ``If-None-Match``
+    until a write or until the next open task becomes overdue.
+    """
+    version = await get_task_version()
+    etag = task_etag(version)
+    current = current_stats_etag(request, etag)
+    if current:
+        return not_modified(current)
 
-    # Tasks by priority
-    priority_result = await db.execute(
-        select(Task.priority, func.count(Task.id)).group_by(Task.priority)
-    )
-    priority_counts = {priority.value: count for priority, count in priority_result.all()}
-
-    # Overdue tasks
-    now = datetime.utcnow()
-    overdue_result = await db.execute(
-        select(func.count(Task.id)).filter(
-            Task.due_date < now,
-            Task.status != TaskStatus.DONE
-        )
-    )
-    overdue = overdue_result.scalar()
+    async def compute():
+        now = datetime.utcnow()
+        stats = await task_stats(db, now)
+        valid_until = await next_overdue_at(db, now)
+        stats["timestamp"] = now.isoformat()
+        # Cached only until the next open task becomes overdue
+        valid_for = None
+        if valid_until is not None:
+            if valid_until.tzinfo is not None:
+                valid_until = valid_until.astimezone(timezone.utc).replace(tzinfo=None)
+            valid_for = (valid_until - now).total_seconds()
+        return json_body(stats), etag_headers(stats_etag(etag, valid_until)), valid_for
 
-    return {
-        "total_tasks": total,
-        "by_status": status_counts,
-        "by_priority": priority_counts,
-        "overdue_tasks": overdue,
-        "timestamp": datetime.utcnow().isoformat()
-    }
+    return await api_response_cache.respond("stats", version, {}, compute)
@@ -0,0 +1,265 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCache:
+    """
+    In-process LRU cache with optional per-entry TTL.
+
+    Counters (``incr``) live outside the LRU so they are never evicted.
+    """
+
+    # Counters are private to this process (see RedisCache.counters_shared)
+    counters_shared = False
+
+    def __init__(self, max_entries: int = 1024, default_ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[Optional[float], str]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        return (await self.get_with_ttl(key))[0]
+
+    async def get_with_ttl(self, key: str) -> Tuple[Optional[str], Optional[float]]:
+        """The value and its remaining TTL in seconds (None if it has none)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, None
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at is not None and expires_at <= now:
+            del self._entries[key]
+            return None, None
+        self._entries.move_to_end(key)
+        return value, expires_at - now if expires_at is not None else None
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._counters.clear()
+
+
+class RedisCache:
+    """
+    Redis-backed cache shared by all workers.
+
+    Falls back to an in-process ``MemoryCache`` while Redis is unreachable so
+    a Redis outage degrades caching instead of failing requests.
+
+    Counters (the task version) then continue in-process from the last
+    value read from Redis. Writes made meanwhile never reach Redis, so once
+    it answers again each counter used offline is advanced past every value
+    this process issued, before it is read or incremented. Otherwise the
+    shared version would return to a value whose cached replies and ETags
+    predate those writes.
+    """
+
+    def __init__(self, url: str, prefix: str = "taskmgr:", max_entries: int = 1024):
+        import redis.asyncio as redis
+
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._errors = (redis.RedisError, OSError)
+        self.prefix = prefix
+        self._fallback = MemoryCache(max_entries=max_entries)
+        # Last counter values read from Redis, and counters used offline
+        self._seen: Dict[str, int] = {}
+        self._offline: Dict[str, int] = {}
+
+    @property
+    def counters_shared(self) -> bool:
+        """Whether counter values come from Redis (the same in every worker)."""
+        return not self._offline
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _log_fallback(self, error: Exception) -> None:
+        logger.warning(f"Redis unavailable, using in-process cache: {error}")
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            return await self._redis.get(self._key(key))
+        except self._errors as e:
+            self._log_fallback(e)
+            return await self._fallback.get(key)
+
+    async def get_with_ttl(self, key: str) -> Tuple[Optional[str], Optional[float]]:
+        """The value and its remaining TTL in seconds, in one round trip."""
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                value, pttl = (
+                    await pipe.get(self._key(key)).pttl(self._key(key)).execute()
+                )
+            return value, pttl / 1000 if value is not None and pttl > 0 else None
+        except self._errors as e:
+            self._log_fallback(e)
+            return await self._fallback.get_with_ttl(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        try:
+            await self._redis.set(
+                self._key(key), value, px=int(ttl * 1000) if ttl else None
+            )
+        except self._errors as e:
+            self._log_fallback(e)
+            await self._fallback.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._redis.delete(self._key(key))
+        except self._errors as e:
+            self._log_fallback(e)
+        await self._fallback.delete(key)
+
+    async def _restore_counters(self) -> None:
+        """Advance the counters used offline in Redis; raises while it is down."""
+        if not self._offline:
+            return
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in self._offline.items():
+                # +1 so the result also differs from the pre-outage value
+                pipe.incrby(self._key(key), value - self._seen.get(key, 0) + 1)
+            results = await pipe.execute()
+        self._seen.update(zip(self._offline, results))
+        logger.info(f"Redis is back, advanced counters: {', '.join(self._offline)}")
+        self._offline.clear()
+        # Entries cached offline were keyed by the in-process counters
+        await self._fallback.clear()
+
+    def _offline_counter(self, key: str, error: Exception) -> int:
+        self._log_fallback(error)
+        return self._offline.setdefault(key, self._seen.get(key, 0))
+
+    async def incr(self, key: str) -> int:
+        try:
+            await self._restore_counters()
+            value = await self._redis.incr(self._key(key))
+        except self._errors as e:
+            self._offline[key] = self._offline_counter(key, e) + 1
+            return self._offline[key]
+        self._seen[key] = value
+        return value
+
+    async def get_counter(self, key: str) -> int:
+        try:
+            await self._restore_counters()
+            value = int(await self._redis.get(self._key(key)) or 0)
+        except self._errors as e:
+            return self._offline_counter(key, e)
+        self._seen[key] = value
+        return value
+
+    async def clear(self) -> None:
+        """Delete every key under the prefix, counters included."""
+        try:
+            keys = [key async for key in self._redis.scan_iter(f"{self.prefix}*")]
+            for start in range(0, len(keys), 1000):
+                await self._redis.delete(*keys[start : start + 1000])
+        except self._errors as e:
+            self._log_fallback(e)
+        self._seen.clear()
+        self._offline.clear()
+        await self._fallback.clear()
+
+
+class TieredCache:
+    """
+    In-process LRU tier in front of a shared cache (Redis).
+
+    Reads try the local tier first; a shared hit is copied into it with the
+    shared entry's remaining TTL, so hot keys skip the network round trip.
+    Writes go to both tiers and counters only to the shared cache. Another
+    worker cannot invalidate the local tier, so it suits entries that never
+    change under a given key, like those keyed by the task version.
+    """
+
+    def __init__(self, local: MemoryCache, shared):
+        self.local = local
+        self.shared = shared
+
+    async def get(self, key: str) -> Optional[str]:
+        return (await self.get_with_ttl(key))[0]
+
+    async def get_with_ttl(self, key: str) -> Tuple[Optional[str], Optional[float]]:
+        value, ttl = await self.local.get_with_ttl(key)
+        if value is not None:
+            return value, ttl
+        value, ttl = await self.shared.get_with_ttl(key)
+        if value is not None:
+            await self.local.set(key, value, ttl)
+        return value, ttl
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        await self.shared.set(key, value, ttl)
+        await self.local.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.shared.delete(key)
+        await self.local.delete(key)
+
+    async def incr(self, key: str) -> int:
+        return await self.shared.incr(key)
+
+    async def get_counter(self, key: str) -> int:
+        return await self.shared.get_counter(key)
+
+    @property
+    def counters_shared(self) -> bool:
+        return self.shared.counters_shared
+
+    async def clear(self) -> None:
+        await self.local.clear()
+        await self.shared.clear()
+
+
+_cache = None
+
+
+def get_cache():
+    """Return the process-wide cache backend selected by ``settings.cache_backend``."""
+    global _cache
+    if _cache is None:
+        if settings.cache_backend == "redis":
+            try:
+                _cache = RedisCache(
+                    settings.redis_url, max_entries=settings.cache_max_entries
+                )
+                if settings.cache_local_entries > 0:
+                    _cache = TieredCache(
+                        MemoryCache(max_entries=settings.cache_local_entries), _cache
+                    )
+            except ImportError:
+                logger.warning("redis package not installed, using in-process cache")
+        if _cache is None:
+            _cache = MemoryCache(max_entries=settings.cache_max_entries)
+    return _cache
+
+
+def set_cache(cache) -> None:
+    """Replace the process-wide cache backend (e.g. with a MemoryCache in tests)."""
+    global _cache
+    _cache = cache
@@ -0,0 +1,59 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """
+    Wall-clock durations of start-up phases (imports, schema, agent build).
+
+    Marks are offsets from the earliest recorded start (``app.main`` records
+    its own import via ``record_since``), so the ``ready`` mark approximates
+    the cold start a freshly scheduled worker pays before serving traffic.
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.marks: Dict[str, float] = {}
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._origin) * 1000
+
+    def record(self, name: str, duration_ms: float) -> None:
+        self.phases[name] = round(duration_ms, 3)
+        metrics.observe(f"startup.{name}", duration_ms)
+
+    def record_since(self, name: str, start: float) -> None:
+        """Record a phase that began (``perf_counter``) before this module loaded."""
+        self._origin = min(self._origin, start)
+        self.record(name, (time.perf_counter() - start) * 1000)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def mark(self, name: str) -> None:
+        """Record the offset of a milestone such as ``ready``."""
+        self.marks[name] = round(self.elapsed_ms(), 3)
+
+    def report(self) -> Dict[str, Any]:
+        return {"phases_ms": dict(self.phases), "marks_ms": dict(self.marks)}
+
+    def log_report(self) -> None:
+        phases = ", ".join(f"{name}={ms:.0f}ms" for name, ms in self.phases.items())
+        marks = ", ".join(f"{name}@{ms:.0f}ms" for name, ms in self.marks.items())
+        logger.info(f"Startup timings: {phases}; {marks}")
+
+
+# Process-wide start-up timer
+startup_timer = StartupTimer()
@@ -0,0 +1,30 @@
+import asyncio
+from typing import Any
+
+from app.core.cache import get_cache
+
+TASK_VERSION_KEY = "tasks:version"
+
+
+async def get_task_version() -> int:
+    """Current version of the tasks table; changes after every write."""
+    return await get_cache().get_counter(TASK_VERSION_KEY)
+
+
+async def bump_task_version() -> int:
+    """Record that tasks changed. Call after every committed write."""
+    return await get_cache().incr(TASK_VERSION_KEY)
+
+
+async def commit_and_bump(session: Any) -> None:
+    """
+    Commit ``session`` and bump the task version.
+
+    The bump runs even if the commit is interrupted (a cancelled turn, a lost
+    connection): the write may have landed, and an extra bump only costs a
+    cache miss while a missed one would serve stale cached replies.
+    """
+    try:
+        await session.commit()
+    finally:
+        await asyncio.shield(bump_task_version())
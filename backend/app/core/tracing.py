@@ -0,0 +1,284 @@
+import contextvars
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Protocol
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """A timed step of a trace; ``start_ms`` is the offset from the trace start."""
+
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    start_ms: float
+    duration_ms: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Trace:
+    """One agent turn: its spans plus turn-level attributes."""
+
+    name: str
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    duration_ms: float = 0.0
+    spans: List[Span] = field(default_factory=list)
+    _start: float = field(default_factory=time.perf_counter, repr=False)
+    _ids: Iterator[int] = field(default_factory=lambda: itertools.count(1), repr=False)
+
+    def offset_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def totals(self) -> Dict[str, int]:
+        return {
+            "prompt_tokens": sum(
+                s.attributes.get("prompt_tokens", 0) for s in self.spans
+            ),
+            "completion_tokens": sum(
+                s.attributes.get("completion_tokens", 0) for s in self.spans
+            ),
+            "llm_calls": sum(1 for s in self.spans if "prompt_tokens" in s.attributes),
+            "tool_calls": sum(1 for s in self.spans if s.name == "tool"),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            **self.totals(),
+            "spans": [
+                {
+                    "name": s.name,
+                    "span_id": s.span_id,
+                    "parent_id": s.parent_id,
+                    "start_ms": s.start_ms,
+                    "duration_ms": s.duration_ms,
+                    "attributes": s.attributes,
+                }
+                for s in self.spans
+            ],
+        }
+
+    def summary(self) -> str:
+        """One log line: where the turn's time and tokens went."""
+        totals = self.totals()
+        top_level = " ".join(
+            f"{s.name}={s.duration_ms:.0f}ms" for s in self.spans if s.parent_id is None
+        )
+        return (
+            f"trace={self.trace_id} path={self.attributes.get('path', '-')} "
+            f"total={self.duration_ms:.0f}ms {top_level} "
+            f"tokens={totals['prompt_tokens']}/{totals['completion_tokens']} "
+            f"tools={totals['tool_calls']}"
+        )
+
+
+class TraceSink(Protocol):
+    def emit(self, trace: Dict[str, Any]) -> None: ...
+
+
+class RingBufferSink:
+    """Keeps the most recent traces in memory for the admin endpoint."""
+
+    def __init__(self, capacity: int):
+        self._lock = threading.Lock()
+        self._traces: deque = deque(maxlen=capacity)
+
+    def emit(self, trace: Dict[str, Any]) -> None:
+        with self._lock:
+            self._traces.append(trace)
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Newest first."""
+        with self._lock:
+            return list(itertools.islice(reversed(self._traces), limit))
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for trace in self._traces:
+                if trace["trace_id"] == trace_id:
+                    return trace
+        return None
+
+
+class JsonlFileSink:
+    """
+    Appends one JSON object per trace to ``path``.
+
+    ``emit`` only queues the trace: a writer thread, started on first use,
+    serialises it and appends it to the file, flushing whenever the queue
+    runs empty, so agent turns never wait on disk I/O.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._failed = False
+
+    def emit(self, trace: Dict[str, Any]) -> None:
+        if self._failed:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._write, name="trace-jsonl", daemon=True
+                )
+                self._thread.start()
+        self._queue.put(trace)
+
+    def _write(self) -> None:
+        try:
+            file = open(self.path, "a", encoding="utf-8")
+        except OSError as e:
+            self._failed = True
+            logger.error(f"Cannot open trace file {self.path}: {e}")
+            return
+        with file:
+            while True:
+                trace = self._queue.get()
+                if trace is None:
+                    break
+                file.write(json.dumps(trace, default=str, separators=(",", ":")))
+                file.write("\n")
+                if self._queue.empty():
+                    file.flush()
+
+    def close(self) -> None:
+        """Write out the queued traces and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Tracer:
+    """
+    Records per-turn traces and hands finished ones to the configured sinks.
+
+    The active trace and span live in context variables, so spans opened in
+    concurrently gathered tasks (parallel tool calls) nest under the span
+    that was current when the tasks were created.
+    """
+
+    def __init__(self, sinks: Optional[List[TraceSink]] = None, enabled: bool = True):
+        self.sinks: List[TraceSink] = list(sinks or [])
+        self.enabled = enabled
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Optional[Trace]]:
+        if not self.enabled:
+            yield None
+            return
+
+        trace = Trace(name=name, attributes=attributes)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(None)
+        try:
+            yield trace
+        except BaseException as e:
+            trace.attributes["error"] = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            trace.duration_ms = round(trace.offset_ms(), 3)
+            self._emit(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        trace = _current_trace.get()
+        if trace is None:
+            yield None
+            return
+
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            span_id=next(trace._ids),
+            parent_id=parent.span_id if parent else None,
+            start_ms=round(trace.offset_ms(), 3),
+            attributes=attributes,
+        )
+        trace.spans.append(span)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+            _current_span.reset(token)
+
+    def annotate(self, **attributes: Any) -> None:
+        """Set attributes on the current span, if any."""
+        span = _current_span.get()
+        if span is not None:
+            span.attributes.update(attributes)
+
+    def annotate_trace(self, **attributes: Any) -> None:
+        """Set attributes on the current trace, if any."""
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.attributes.update(attributes)
+
+    def close(self) -> None:
+        """Let sinks that write in the background finish (at shutdown)."""
+        for sink in self.sinks:
+            close = getattr(sink, "close", None)
+            if close is not None:
+                close()
+
+    def _emit(self, trace: Trace) -> None:
+        record = trace.to_dict()
+        for sink in self.sinks:
+            try:
+                sink.emit(record)
+            except Exception as e:
+                logger.error(f"Trace sink {type(sink).__name__} failed: {e}")
+
+
+# Recent traces, served at /admin/traces
+trace_buffer = RingBufferSink(settings.tracing_buffer_size)
+
+# Global tracer used by the agent
+tracer = Tracer(
+    sinks=[trace_buffer]
+    + (
+        [JsonlFileSink(settings.tracing_jsonl_path)]
+        if settings.tracing_jsonl_path
+        else []
+    ),
+    enabled=settings.tracing_enabled,
+)
@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised by ``submit`` when a job cannot be admitted."""
+
+    def __init__(self, message: str, depth: int):
+        super().__init__(message)
+        self.depth = depth
+
+
+@dataclass
+class _Job:
+    client_id: str
+    fn: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    task: Optional[asyncio.Task] = None
+
+
+class FairWorkQueue:
+    """
+    Bounded work queue served by a fixed pool of worker tasks.
+
+    Each client has its own FIFO; workers take jobs round-robin across
+    clients, so one client sending a burst cannot starve the others. At most
+    ``max_pending`` jobs wait in total and ``max_pending_per_client`` per
+    client; beyond that ``submit`` raises ``QueueFull`` instead of letting
+    callers wait indefinitely. Workers start on the first submit.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_pending: int,
+        max_pending_per_client: int,
+        name: str = "queue",
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_pending_per_client = max_pending_per_client
+        self.name = name
+        self._queues: "OrderedDict[str, Deque[_Job]]" = OrderedDict()
+        self._pending = 0
+        self._running = 0
+        self._ready = asyncio.Event()
+        self._worker_tasks: List[asyncio.Task] = []
+
+    def depth(self) -> int:
+        return self._pending
+
+    def running(self) -> int:
+        return self._running
+
+    def _position(self, client_id: str) -> int:
+        """
+        Jobs that run before a job appended now for ``client_id`` (0 = runs
+        immediately). Exact under round-robin if no other jobs arrive.
+        """
+        ahead_in_own = len(self._queues.get(client_id, ()))
+        ahead = ahead_in_own
+        before_client = True
+        for other, jobs in self._queues.items():
+            if other == client_id:
+                before_client = False
+                continue
+            ahead += min(len(jobs), ahead_in_own)
+            if before_client and len(jobs) > ahead_in_own:
+                ahead += 1
+        idle = self.workers - self._running
+        return max(0, ahead - idle + 1)
+
+    def submit(self, client_id: str, fn: Callable[[], Awaitable[Any]]) -> "Ticket":
+        """Enqueue ``fn``; raise ``QueueFull`` when the queue or client is at its cap."""
+        client_jobs = len(self._queues.get(client_id, ()))
+        if self._pending >= self.max_pending:
+            metrics.increment(f"{self.name}.rejected")
+            raise QueueFull("The queue is full", self._pending)
+        if client_jobs >= self.max_pending_per_client:
+            metrics.increment(f"{self.name}.rejected")
+            raise QueueFull("Too many requests queued for this client", client_jobs)
+
+        self._ensure_workers()
+        position = self._position(client_id)
+        job = _Job(client_id, fn, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(client_id, deque()).append(job)
+        self._pending += 1
+        self._ready.set()
+        metrics.increment(f"{self.name}.submitted")
+        self._update_gauges()
+        return Ticket(self, job, position)
+
+    async def run(
+        self,
+        client_id: str,
+        fn: Callable[[], Awaitable[Any]],
+        on_queued: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> Any:
+        """Submit ``fn`` and wait for its result, reporting the position if it waits."""
+        ticket = self.submit(client_id, fn)
+        if ticket.position and on_queued is not None:
+            try:
+                await on_queued(ticket.position)
+            except BaseException:
+                # Nobody will wait for the result
+                ticket.abandon()
+                raise
+        return await ticket
+
+    def _take(self) -> Optional[_Job]:
+        while self._queues:
+            client_id, jobs = next(iter(self._queues.items()))
+            job = jobs.popleft()
+            if jobs:
+                self._queues.move_to_end(client_id)
+            else:
+                del self._queues[client_id]
+            self._pending -= 1
+            if not job.future.cancelled():
+                return job
+        return None
+
+    def _abandon(self, job: _Job) -> None:
+        """
+        The caller went away: drop the job if it is still waiting, or cancel
+        it if a worker is already running it.
+        """
+        metrics.increment(f"{self.name}.abandoned")
+        if job.task is not None:
+            job.task.cancel()
+            return
+        jobs = self._queues.get(job.client_id)
+        if jobs is not None and job in jobs:
+            jobs.remove(job)
+            if not jobs:
+                del self._queues[job.client_id]
+            self._pending -= 1
+            self._update_gauges()
+
+    async def _worker(self) -> None:
+        while True:
+            job = self._take()
+            if job is None:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            wait_ms = (time.perf_counter() - job.enqueued_at) * 1000
+            metrics.observe(f"{self.name}.wait", wait_ms)
+            self._running += 1
+            self._update_gauges()
+            start = time.perf_counter()
+            # Run the job as its own task so its caller can cancel it
+            # without taking the worker down
+            job.task = asyncio.ensure_future(job.fn())
+            try:
+                await asyncio.wait([job.task])
+            except asyncio.CancelledError:
+                job.task.cancel()
+                job.future.cancel()
+                raise
+            else:
+                if job.task.cancelled():
+                    job.future.cancel()
+                elif job.task.exception() is not None:
+                    if not job.future.done():
+                        job.future.set_exception(job.task.exception())
+                elif not job.future.done():
+                    job.future.set_result(job.task.result())
+            finally:
+                self._running -= 1
+                metrics.observe(
+                    f"{self.name}.run", (time.perf_counter() - start) * 1000
+                )
+                metrics.increment(f"{self.name}.completed")
+                self._update_gauges()
+
+    def _ensure_workers(self) -> None:
+        self._worker_tasks = [t for t in self._worker_tasks if not t.done()]
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self) -> None:
+        """Cancel the workers and every job still waiting."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        for jobs in self._queues.values():
+            for job in jobs:
+                job.future.cancel()
+        self._queues.clear()
+        self._pending = 0
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        metrics.set_gauge(f"{self.name}.depth", self._pending)
+        metrics.set_gauge(f"{self.name}.running", self._running)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "depth": self._pending,
+            "clients": len(self._queues),
+        }
+
+
+class Ticket:
+    """A submitted job: its initial queue ``position`` and awaitable result."""
+
+    def __init__(self, queue: FairWorkQueue, job: _Job, position: int):
+        self._queue = queue
+        self._job = job
+        self.position = position
+
+    def __await__(self):
+        return self._wait().__await__()
+
+    def abandon(self) -> None:
+        """Give up on the job: drop it if it is waiting, cancel it if running."""
+        if not self._job.future.done():
+            self._queue._abandon(self._job)
+            self._job.future.cancel()
+
+    async def _wait(self) -> Any:
+        try:
+            return await asyncio.shield(self._job.future)
+        except asyncio.CancelledError:
+            self.abandon()
+            # Return once a running job has unwound too (its LLM call or
+            # tool stopped, its transaction rolled back)
+            if self._job.task is not None:
+                await asyncio.gather(self._job.task, return_exceptions=True)
+            raise
@@ -2,19 +2,41 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sess
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from typing import Optional
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Create async engine
-print(settings.async_database_url, "----)))))))))))")
+logger.debug(
+    "Database: %s", make_url(settings.async_database_url).render_as_string(hide_password=True)
+)
+# SQLite (local benchmarks/dev stand-in) does not take pool sizing options
+_pool_options = (
+    {}
+    if settings.async_database_url.startswith("sqlite")
+    else {
+        "pool_size": 10,
+        "max_overflow": 20,
+        # The threshold of pg_trgm's "<%" operator, which filters the title
+        # matches in app/tools/title_resolver.py (a placeholder until the
+        # extension is loaded)
+        "connect_args": {
+            "server_settings": {
+                "pg_trgm.word_similarity_threshold": str(
+                    settings.title_match_min_score
+                )
+            }
+        },
+    }
+)
 async_engine = create_async_engine(
     settings.async_database_url,
     echo=settings.debug,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    **_pool_options,
 )
 
 # Create async session factory
@@ -25,13 +47,22 @@ async_session = async_sessionmaker(
     autoflush=False,
 )
 
-# Sync engine for migrations
-sync_engine = create_engine(
-    settings.database_url,
-    echo=settings.debug,
-)
+# Sync engine for migrations and scripts; created on first use so the
+# server (async only) never loads the sync driver
+_sync_engine: Optional[Engine] = None
+
+
+def get_sync_engine() -> Engine:
+    global _sync_engine
+    if _sync_engine is None:
+        _sync_engine = create_engine(
+            settings.database_url,
+            echo=settings.debug,
+        )
+    return _sync_engine
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
@@ -50,7 +81,7 @@ async def get_async_session() -> AsyncSession:
 
 # Dependency to get sync database session
 def get_db_session():
-    db = SessionLocal()
+    db = SessionLocal(bind=get_sync_engine())
     try:
         yield db
     finally:
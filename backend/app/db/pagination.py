@@ -0,0 +1,105 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, tuple_
+
+from app.models.task import Task
+
+# Largest page a client or tool may ask for
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor token that was not issued by ``encode_cursor``."""
+
+
+def encode_cursor(task: Task) -> str:
+    """Opaque token for the position just after ``task`` in newest-first order."""
+    payload = json.dumps(
+        [task.created_at.isoformat() if task.created_at else None, task.id],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def page_size(limit: Optional[int], default: int) -> int:
+    """Clamp a requested page size to 1..``MAX_PAGE_SIZE``."""
+    return max(1, min(limit or default, MAX_PAGE_SIZE))
+
+
+def newest_first_page(query: Select, cursor: Optional[str], limit: int) -> Select:
+    """
+    Order ``query`` newest first and restrict it to the page after ``cursor``.
+
+    Keyset pagination on ``(created_at, id)``: the row-value comparison is
+    served by ``ix_tasks_created_at_id``, so every page costs the same
+    however deep it is, unlike OFFSET, which reads and discards the rows
+    before it. One extra row is fetched to tell whether a next page exists
+    (see ``split_page``).
+    """
+    if cursor:
+        created_at, task_id = decode_cursor(cursor)
+        query = query.where(tuple_(Task.created_at, Task.id) < (created_at, task_id))
+    return query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1)
+
+
+def split_page(rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """The page's rows and the cursor for the next page (None on the last)."""
+    page = list(rows[:limit])
+    next_cursor = encode_cursor(page[-1]) if len(rows) > limit else None
+    return page, next_cursor
+
+
+def encode_ranked_cursor(rank: float, task_id: int) -> str:
+    """Opaque token for the position after a row of a relevance-ranked list."""
+    payload = json.dumps({"rank": rank, "id": task_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_ranked_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        return float(payload["rank"]), int(payload["id"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def ranked_page(query: Select, rank: Any, cursor: Optional[str], limit: int) -> Select:
+    """
+    Order ``query`` by ``rank`` (most relevant first) and restrict it to the
+    page after ``cursor``; rows come back as ``(Task, rank)``. Keyset on
+    ``(rank, id)`` like ``newest_first_page``, but the rank is computed per
+    row, so only the search condition itself is index-driven.
+    """
+    if cursor:
+        last_rank, task_id = decode_ranked_cursor(cursor)
+        query = query.where(tuple_(rank, Task.id) < (last_rank, task_id))
+    return (
+        query.add_columns(rank.label("rank"))
+        .order_by(rank.desc(), Task.id.desc())
+        .limit(limit + 1)
+    )
+
+
+def split_ranked_page(
+    rows: Sequence[Any], limit: int
+) -> Tuple[List[Task], Optional[str]]:
+    """``split_page`` for ``(Task, rank)`` rows of a ``ranked_page`` query."""
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last_task, last_rank = page[-1]
+        next_cursor = encode_ranked_cursor(last_rank, last_task.id)
+    return [task for task, _ in page], next_cursor
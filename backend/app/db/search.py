@@ -0,0 +1,129 @@
+import logging
+import re
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import case, false, func, literal, literal_column, or_, and_, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.task import Task, TaskPriority, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+# Generated column added by Alembic revision 004 (weighted title + description).
+# It is not mapped on Task: SQLite, used in development, has no tsvector.
+search_vector = literal_column("tasks.search_vector", TSVECTOR)
+
+# Words of a query beyond this are ignored
+MAX_SEARCH_TERMS = 8
+
+_full_text: Optional[bool] = None
+
+
+def search_terms(search_text: str) -> List[str]:
+    """Lower-cased words of ``search_text``, each matched as a prefix."""
+    return re.findall(r"\w+", search_text.lower())[:MAX_SEARCH_TERMS]
+
+
+async def detect_full_text_search(session: AsyncSession) -> bool:
+    """
+    Whether searches can use the tsvector column: Postgres with revision 004
+    applied, unless TEXT_SEARCH_BACKEND=like. Checked once per process.
+    """
+    global _full_text
+    if _full_text is None:
+        available = False
+        if (
+            settings.text_search_backend != "like"
+            and session.bind.dialect.name == "postgresql"
+        ):
+            available = bool(
+                await session.scalar(
+                    text(
+                        "SELECT 1 FROM information_schema.columns "
+                        "WHERE table_name = 'tasks' AND column_name = 'search_vector'"
+                    )
+                )
+            )
+            if not available:
+                logger.warning(
+                    "tasks.search_vector is missing (run the Alembic migrations); "
+                    "searching tasks with ILIKE"
+                )
+        _full_text = available
+    return _full_text
+
+
+def text_search(search_text: str) -> Tuple[Any, Any]:
+    """
+    WHERE clause and relevance expression for a task search.
+
+    Every word must match the start of a word in the title or description
+    ("rep" finds "quarterly report"). With full-text search this is a GIN
+    index lookup of ``search_vector @@ 'rep:* & ...'`` ranked by
+    ``ts_rank_cd`` (title words weigh more); otherwise (SQLite, migrations
+    not applied, or before ``detect_full_text_search`` ran) it falls back to
+    ILIKE, ranked by the number of words found in the title.
+
+    A text without words ("!!!") matches no task rather than dropping the
+    filter, which would list, export or bulk-edit every task.
+    """
+    terms = search_terms(search_text)
+    if not terms:
+        return false(), literal(0)
+
+    if _full_text:
+        query = func.to_tsquery(
+            literal_column("'simple'::regconfig"),
+            " & ".join(f"{term}:*" for term in terms),
+        )
+        return search_vector.op("@@")(query), func.ts_rank_cd(search_vector, query)
+
+    def word_prefix(column, term: str):
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return column.ilike(f"{escaped}%", escape="\\") | column.ilike(
+            f"% {escaped}%", escape="\\"
+        )
+
+    condition = and_(
+        *(
+            or_(word_prefix(Task.title, term), word_prefix(Task.description, term))
+            for term in terms
+        )
+    )
+    rank = sum(case((word_prefix(Task.title, term), 1), else_=0) for term in terms)
+    return condition, rank
+
+
+def task_filters(
+    search_text: Optional[str] = None,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    overdue: Optional[bool] = None,
+) -> List:
+    """WHERE clauses shared by filter_tasks, the bulk tools and bulk endpoints."""
+    conditions = []
+
+    # Word-prefix search in title and description
+    if search_text:
+        conditions.append(text_search(search_text)[0])
+
+    # Status filter
+    if status and status in ["pending", "in_progress", "done", "cancelled"]:
+        conditions.append(Task.status == TaskStatus(status))
+
+    # Priority filter
+    if priority and priority in ["low", "medium", "high", "urgent"]:
+        conditions.append(Task.priority == TaskPriority(priority))
+
+    # Overdue filter
+    if overdue is not None:
+        now = datetime.utcnow()
+        if overdue:
+            conditions.append((Task.due_date < now) & (Task.status != TaskStatus.DONE))
+        else:
+            conditions.append((Task.due_date >= now) | (Task.due_date.is_(None)))
+
+    return conditions
@@ -0,0 +1,242 @@
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, func, literal, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.task_version import bump_task_version
+from app.models.task import Task, TaskCounter, TaskPriority, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+COUNTER_NAMES = (
+    ["total"]
+    + [f"status:{status.value}" for status in TaskStatus]
+    + [f"priority:{priority.value}" for priority in TaskPriority]
+)
+
+
+def _open():
+    # Matches the partial index ix_tasks_open_due_date; the status is
+    # rendered inline so Postgres' generic plans can match its predicate
+    done = bindparam("done", TaskStatus.DONE, Task.status.type, literal_execute=True)
+    return Task.status != done
+
+
+def _overdue(now: datetime):
+    return Task.due_date < now, _open()
+
+
+def _summary(counts: Dict[str, int], overdue: int) -> Dict[str, Any]:
+    """
+    The stats payload; statuses and priorities without tasks are left out.
+    Counters are never reported below zero, even if they have drifted there.
+    """
+
+    def group(prefix: str) -> Dict[str, int]:
+        return {
+            name[len(prefix) :]: count
+            for name, count in counts.items()
+            if name.startswith(prefix) and count > 0
+        }
+
+    return {
+        "total_tasks": max(counts.get("total", 0), 0),
+        "by_status": group("status:"),
+        "by_priority": group("priority:"),
+        "overdue_tasks": overdue,
+    }
+
+
+async def count_tasks(
+    session: AsyncSession, now: Optional[datetime] = None
+) -> Tuple[Dict[str, int], int]:
+    """
+    Every counter and the overdue count, from a single pass over tasks
+    (one aggregate with a ``FILTER`` clause per counter).
+    """
+    now = now or datetime.utcnow()
+    columns = (
+        [func.count(Task.id)]
+        + [func.count(Task.id).filter(Task.status == status) for status in TaskStatus]
+        + [
+            func.count(Task.id).filter(Task.priority == priority)
+            for priority in TaskPriority
+        ]
+        + [func.count(Task.id).filter(*_overdue(now))]
+    )
+    *counts, overdue = (await session.execute(select(*columns))).one()
+    return dict(zip(COUNTER_NAMES, counts)), overdue
+
+
+async def task_stats(
+    session: AsyncSession, now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Task totals by status and priority, plus the overdue count.
+
+    With ``task_stats_counters`` the totals are read from ``task_counters``
+    and only the (time-dependent) overdue count touches tasks, in the same
+    round trip; otherwise, or until the counters are first reconciled, they
+    are aggregated from the tasks table.
+    """
+    now = now or datetime.utcnow()
+    if settings.task_stats_counters:
+        rows = await session.execute(
+            select(TaskCounter.name, TaskCounter.value).union_all(
+                select(literal("overdue"), func.count(Task.id)).where(*_overdue(now))
+            )
+        )
+        counts = dict(rows.all())
+        overdue = counts.pop("overdue", 0)
+        if "total" in counts:
+            return _summary(counts, overdue)
+    return _summary(*await count_tasks(session, now))
+
+
+async def next_overdue_at(session: AsyncSession, now: datetime) -> Optional[datetime]:
+    """
+    When the overdue count next changes without a write: the earliest due
+    date of an open task that is not overdue yet (one index probe).
+    """
+    return await session.scalar(
+        select(func.min(Task.due_date)).where(Task.due_date >= now, _open())
+    )
+
+
+async def update_tasks(
+    session: AsyncSession, conditions: List[Any], values: Dict[str, Any]
+) -> List[Task]:
+    """
+    UPDATE ... RETURNING the tasks matching ``conditions``, moving them
+    between counters when ``values`` changes a counted column.
+
+    On Postgres the previous values come from a locked pre-image in the
+    same statement (``UPDATE ... FROM (SELECT ... FOR UPDATE)``). SQLite
+    cannot return FROM columns, so they are read first in the same
+    transaction; its writers are serialised anyway.
+    """
+    statement = (
+        update(Task).values(**values).execution_options(synchronize_session=False)
+    )
+    if not (settings.task_stats_counters and values.keys() & {"status", "priority"}):
+        return (
+            await session.scalars(statement.where(*conditions).returning(Task))
+        ).all()
+
+    if session.bind.dialect.name == "postgresql":
+        previous = (
+            select(Task.id, Task.status, Task.priority)
+            .where(*conditions)
+            .with_for_update()
+            .subquery("previous")
+        )
+        rows = (
+            await session.execute(
+                statement.where(Task.id == previous.c.id).returning(
+                    Task, previous.c.status, previous.c.priority
+                )
+            )
+        ).all()
+    else:
+        before = await session.execute(
+            select(Task.id, Task.status, Task.priority).where(*conditions)
+        )
+        old = {task_id: (status, priority) for task_id, status, priority in before}
+        updated = await session.scalars(statement.where(*conditions).returning(Task))
+        rows = [(task, *old[task.id]) for task in updated.all()]
+
+    await _apply(
+        session,
+        added=[(task.status, task.priority) for task, _, _ in rows],
+        removed=[(status, priority) for _, status, priority in rows],
+    )
+    return [task for task, _, _ in rows]
+
+
+async def _apply(
+    session: AsyncSession,
+    added: Iterable[Tuple[TaskStatus, TaskPriority]] = (),
+    removed: Iterable[Tuple[TaskStatus, TaskPriority]] = (),
+) -> None:
+    deltas: Counter = Counter()
+    for sign, rows in ((1, added), (-1, removed)):
+        for status, priority in rows:
+            deltas["total"] += sign
+            deltas[f"status:{status.value}"] += sign
+            deltas[f"priority:{priority.value}"] += sign
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    # One UPDATE in the write's own transaction, so the counters commit or
+    # roll back with it
+    await session.execute(
+        update(TaskCounter)
+        .where(TaskCounter.name.in_(sorted(deltas)))
+        .values(value=TaskCounter.value + case(deltas, value=TaskCounter.name))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def record_created(session: AsyncSession, tasks: Iterable[Any]) -> None:
+    """Count newly inserted tasks (anything with ``status`` and ``priority``)."""
+    if settings.task_stats_counters:
+        await _apply(session, added=[(t.status, t.priority) for t in tasks])
+
+
+async def record_deleted(session: AsyncSession, rows: Iterable[Any]) -> None:
+    """Uncount deleted tasks, e.g. DELETE ... RETURNING status, priority rows."""
+    if settings.task_stats_counters:
+        await _apply(session, removed=[(r.status, r.priority) for r in rows])
+
+
+async def reconcile_task_counters(session: AsyncSession) -> Dict[str, int]:
+    """
+    Check ``task_counters`` against a fresh count of the tasks table and
+    correct it (creating missing counters). Returns the drift per counter.
+
+    The counters are locked first: writers that have not updated them yet
+    wait and apply their deltas on top of the corrected values, and every
+    write committed before the lock is already in the count. A missing
+    counter has no row to lock, so then task writes are held off instead
+    (on Postgres; SQLite serialises writers anyway) until it is created.
+    """
+    stored = dict(
+        (
+            await session.execute(
+                select(TaskCounter.name, TaskCounter.value).with_for_update()
+            )
+        ).all()
+    )
+    missing = [name for name in COUNTER_NAMES if name not in stored]
+    if missing and session.bind.dialect.name == "postgresql":
+        await session.execute(text("LOCK TABLE tasks IN SHARE MODE"))
+    actual, _ = await count_tasks(session)
+
+    drift = {}
+    for name in missing:
+        session.add(TaskCounter(name=name, value=actual[name]))
+    for name, value in stored.items():
+        if name in actual and value != actual[name]:
+            drift[name] = actual[name] - value
+            await session.execute(
+                update(TaskCounter)
+                .where(TaskCounter.name == name)
+                .values(value=actual[name])
+                .execution_options(synchronize_session=False)
+            )
+    await session.commit()
+
+    metrics.increment("task_stats.reconciled")
+    if drift:
+        # Cached stats (and their ETags) were built from the drifted counters
+        await bump_task_version()
+        metrics.increment("task_stats.counter_drift", sum(map(abs, drift.values())))
+        logger.warning(f"Corrected drifted task counters: {drift}")
+    if missing:
+        logger.info(f"Initialised task counters: {', '.join(missing)}")
+    return drift
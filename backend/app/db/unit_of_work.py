@@ -0,0 +1,157 @@
+import asyncio
+import contextvars
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.task_version import commit_and_bump
+from app.db.database import async_session
+
+logger = logging.getLogger(__name__)
+
+
+class UnitOfWork:
+    """
+    One session and transaction shared by the tool calls of an agent turn.
+
+    Tool calls take turns on the session (an ``AsyncSession`` cannot be used
+    concurrently); writes are flushed rather than committed and ``complete``
+    commits them together, so a multi-tool turn uses one pooled connection
+    and one commit. If a tool raised (or the agent marks the turn ``failed``
+    because a write tool reported failure), later tool calls are refused
+    and the whole turn is rolled back. With ``snapshot_reads`` read-only tools use
+    the same transaction too (REPEATABLE READ on Postgres); otherwise they
+    only join it once the turn has written, so they see its own changes.
+
+    The price is concurrency: calls on the shared session run one at a time,
+    so the writes of a tool stage, and every read after the turn's first
+    write, are serialised even though the stage starts them together. Only
+    reads before any write run in parallel, on their own sessions.
+    ``measure_session_wait`` reports how long each call waited for its turn.
+    """
+
+    def __init__(self, snapshot_reads: bool = False):
+        self.snapshot_reads = snapshot_reads
+        self.lock = asyncio.Lock()
+        self.session: Optional[AsyncSession] = None
+        self.wrote = False
+        self.failed = False
+        self.completed = False
+
+    def shares_reads(self) -> bool:
+        return self.snapshot_reads or self.wrote
+
+    async def get_session(self) -> AsyncSession:
+        """The turn's session, opened on first use."""
+        if self.session is None:
+            self.session = async_session()
+            if self.snapshot_reads and self.session.bind.dialect.name == "postgresql":
+                await self.session.connection(
+                    execution_options={"isolation_level": "REPEATABLE READ"}
+                )
+        return self.session
+
+    async def complete(self) -> bool:
+        """Commit the turn's writes; returns False if they were rolled back."""
+        self.completed = True
+        if self.session is None:
+            return not self.failed
+        if self.failed:
+            await self.session.rollback()
+            return False
+        if self.wrote:
+            try:
+                await commit_and_bump(self.session)
+            except Exception as e:
+                logger.error(f"Committing the turn's writes failed: {e}")
+                return False
+        else:
+            await self.session.rollback()  # read-only; nothing to commit
+        return True
+
+    async def close(self) -> None:
+        if self.session is not None:
+            # Rolls back anything not committed (e.g. a cancelled turn)
+            await self.session.close()
+            self.session = None
+
+
+_current_unit_of_work: contextvars.ContextVar[Optional[UnitOfWork]] = (
+    contextvars.ContextVar("unit_of_work", default=None)
+)
+
+_session_waits: contextvars.ContextVar[Optional[List[float]]] = contextvars.ContextVar(
+    "session_waits", default=None
+)
+
+
+@contextmanager
+def measure_session_wait() -> Iterator[List[float]]:
+    """
+    Collect how long (ms) each ``task_session`` inside the block waited for
+    the turn's shared session, e.g. around one tool call.
+    """
+    waits: List[float] = []
+    token = _session_waits.set(waits)
+    try:
+        yield waits
+    finally:
+        _session_waits.reset(token)
+
+
+@asynccontextmanager
+async def unit_of_work(snapshot_reads: bool = False) -> AsyncIterator[UnitOfWork]:
+    """Make a ``UnitOfWork`` current for the tool calls run inside the block."""
+    uow = UnitOfWork(snapshot_reads=snapshot_reads)
+    token = _current_unit_of_work.set(uow)
+    try:
+        yield uow
+    finally:
+        _current_unit_of_work.reset(token)
+        await asyncio.shield(uow.close())
+
+
+@asynccontextmanager
+async def task_session(writes: bool = True) -> AsyncIterator[AsyncSession]:
+    """
+    Session for one tool call.
+
+    Inside ``unit_of_work`` this is the turn's shared session, held under its
+    lock for the duration of the call; otherwise (fast path, REST, scripts) a
+    fresh session that the tool commits itself via ``commit_task_write``.
+    """
+    uow = _current_unit_of_work.get()
+    if uow is None or (not writes and not uow.shares_reads()):
+        async with async_session() as session:
+            yield session
+        return
+
+    start = time.perf_counter()
+    async with uow.lock:
+        waits = _session_waits.get()
+        if waits is not None:
+            waits.append((time.perf_counter() - start) * 1000)
+        if uow.failed:
+            raise RuntimeError("Skipped because an earlier step of this request failed")
+        session = await uow.get_session()
+        try:
+            yield session
+        except BaseException:
+            uow.failed = True
+            raise
+
+
+async def commit_task_write(session: AsyncSession) -> None:
+    """
+    Make a tool's write durable: flush it into the turn's unit of work, or
+    commit it (bumping the task version) when the tool runs on its own.
+    """
+    uow = _current_unit_of_work.get()
+    if uow is not None and uow.session is session:
+        await session.flush()
+        uow.wrote = True
+    else:
+        await commit_and_bump(session)
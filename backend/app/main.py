@@ -1,17 +1,36 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Depends
+import time
+
+_import_started = time.perf_counter()
+
+from fastapi import (
+    FastAPI,
+    WebSocket,
+    WebSocketDisconnect,
+    HTTPException,
+    Depends,
+    Query,
+    Request,
+)
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Optional
 import asyncio
 import json
 import logging
+import secrets
+import uuid
 from datetime import datetime
 
 try:
     # Try absolute imports first (when run as module)
     from app.core.config import settings
-    from app.db.database import async_engine, Base
-    from app.agents.task_agent import task_agent
+    from app.core.metrics import metrics
+    from app.core.startup import startup_timer
+    from app.core.tracing import trace_buffer, tracer
+    from app.core.work_queue import FairWorkQueue, QueueFull
+    from app.db.database import async_engine, async_session, Base
+    from app.db.search import detect_full_text_search
+    from app.db.task_stats import reconcile_task_counters
     from app.models.schemas import ChatMessage, AgentResponse, WebSocketMessage
     from app.api.routes import router
 except ImportError:
@@ -22,8 +41,13 @@ except ImportError:
     sys.path.insert(0, str(Path(__file__).parent.parent))
 
     from app.core.config import settings
-    from app.db.database import async_engine, Base
-    from app.agents.task_agent import task_agent
+    from app.core.metrics import metrics
+    from app.core.startup import startup_timer
+    from app.core.tracing import trace_buffer, tracer
+    from app.core.work_queue import FairWorkQueue, QueueFull
+    from app.db.database import async_engine, async_session, Base
+    from app.db.search import detect_full_text_search
+    from app.db.task_stats import reconcile_task_counters
     from app.models.schemas import ChatMessage, AgentResponse, WebSocketMessage
     from app.api.routes import router
 
@@ -77,6 +101,102 @@ class ConnectionManager:
 # Global connection manager
 manager = ConnectionManager()
 
+# Chat turns run on a bounded worker pool, round-robin across client hosts
+agent_queue = FairWorkQueue(
+    workers=settings.agent_queue_workers,
+    max_pending=settings.agent_queue_max_pending,
+    max_pending_per_client=settings.agent_queue_max_pending_per_client,
+    name="agent.queue",
+)
+
+# The agent (LangChain/LangGraph, LLM client, compiled graph) is built off the
+# event loop on first use; see settings.agent_warmup
+_agent_loading: Optional[asyncio.Future] = None
+
+
+def _load_agent():
+    with startup_timer.phase("agent"):
+        from app.agents.task_agent import get_task_agent
+
+        agent = get_task_agent()
+    startup_timer.mark("agent_ready")
+    logger.info(f"Agent ready in {startup_timer.phases['agent']:.0f}ms")
+    return agent
+
+
+async def get_agent():
+    global _agent_loading
+    if _agent_loading is None:
+        _agent_loading = asyncio.ensure_future(asyncio.to_thread(_load_agent))
+    loading = _agent_loading
+    try:
+        return await asyncio.shield(loading)
+    except Exception:
+        # Let the next chat turn retry a failed build
+        if _agent_loading is loading:
+            _agent_loading = None
+        raise
+
+
+async def _read_frames(
+    websocket: WebSocket, incoming: asyncio.Queue, disconnected: asyncio.Event
+):
+    """Pump client frames into ``incoming``; ``None`` marks the end."""
+    try:
+        while True:
+            await incoming.put(await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"WebSocket receive error: {e}")
+    finally:
+        disconnected.set()
+        incoming.put_nowait(None)
+
+
+async def _run_while_connected(turn: asyncio.Task, disconnected: asyncio.Event):
+    """
+    Await a queued chat turn (``agent_queue.run``). If the client disconnects
+    first, the turn is cancelled and ``None`` returned once its job has
+    unwound: the LLM call or tool stopped and its transaction rolled back.
+    """
+    watcher = asyncio.create_task(disconnected.wait())
+    try:
+        await asyncio.wait({turn, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not turn.done():
+            turn.cancel()
+            metrics.increment("agent.turn.disconnected")
+            # Cancelling the wait abandons the job, which the ticket waits
+            # for (see Ticket._wait)
+            await asyncio.gather(turn, return_exceptions=True)
+    if turn.cancelled() and disconnected.is_set():
+        return None
+    return turn.result()
+
+
+async def _warm_up_agent():
+    try:
+        await get_agent()
+    except Exception as e:
+        logger.error(f"Agent warm-up failed: {e}")
+
+
+async def _reconcile_task_counters_once():
+    try:
+        async with async_session() as session:
+            await reconcile_task_counters(session)
+    except Exception as e:
+        logger.error(f"Task counter reconciliation failed: {e}")
+
+
+async def _reconcile_task_counters():
+    """Re-check the stats counters every task_stats_reconcile_interval."""
+    while settings.task_stats_reconcile_interval > 0:
+        await asyncio.sleep(settings.task_stats_reconcile_interval)
+        await _reconcile_task_counters_once()
+
 
 # Lifespan context manager
 @asynccontextmanager
@@ -84,17 +204,52 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Task Management Agent...")
 
-    # Create database tables
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-    logger.info("Database tables created")
+    # Create database tables (skipped when Alembic migrations own the schema)
+    if settings.db_create_tables:
+        with startup_timer.phase("create_tables"):
+            async with async_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+        logger.info("Database tables created")
+    else:
+        logger.info("Skipping table creation; schema is managed by migrations")
+
+    # Decide once whether task searches can use the full-text index
+    if async_engine.dialect.name == "postgresql":
+        with startup_timer.phase("search_backend"):
+            try:
+                async with async_session() as session:
+                    await detect_full_text_search(session)
+            except Exception as e:
+                logger.warning(f"Could not check for full-text search: {e}")
+
+    # Seed (or correct) the incrementally kept task counters before serving
+    # requests, then verify them periodically
+    reconciler = None
+    if settings.task_stats_counters:
+        with startup_timer.phase("task_counters"):
+            await _reconcile_task_counters_once()
+        reconciler = asyncio.create_task(_reconcile_task_counters())
+
+    warm_up = None
+    if settings.agent_warmup == "eager":
+        await get_agent()
+    elif settings.agent_warmup == "background":
+        warm_up = asyncio.create_task(_warm_up_agent())
+
+    startup_timer.mark("ready")
+    startup_timer.log_report()
     logger.info("Task Management Agent ready!")
 
     yield
 
     # Shutdown
     logger.info("Shutting down Task Management Agent...")
+    if warm_up is not None and not warm_up.done():
+        warm_up.cancel()
+    if reconciler is not None and not reconciler.done():
+        reconciler.cancel()
+    await agent_queue.stop()
+    tracer.close()
     await async_engine.dispose()
 
 
@@ -113,29 +268,60 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Include API routes
 app.include_router(router, prefix="/api/v1", tags=["tasks"])
 
+startup_timer.record_since("import", _import_started)
+
+
+def _client_host(websocket: WebSocket) -> str:
+    """
+    The client's address: the peer's, or behind a trusted proxy the last
+    X-Forwarded-For hop not added by a trusted proxy. Clients can write
+    any X-Forwarded-For they like, so it is never taken from anyone else.
+    """
+    host = websocket.client.host if websocket.client else ""
+    trusted = set(settings.trusted_proxies)
+    if host in trusted:
+        hops = websocket.headers.get("x-forwarded-for", "").split(",")
+        for hop in reversed([hop.strip() for hop in hops if hop.strip()]):
+            host = hop
+            if hop not in trusted:
+                break
+    return host
+
 
 # WebSocket endpoint for real-time chat and updates
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
+    # Conversation memory lives as long as this connection
+    conversation_id = uuid.uuid4().hex
+    # Fair scheduling is per client host, so extra sockets don't buy capacity
+    client_id = _client_host(websocket) or conversation_id
+    agent = None
+    # Frames are read by a separate task so a disconnect is noticed (and the
+    # running turn cancelled) while the agent is still working
+    incoming: asyncio.Queue = asyncio.Queue()
+    disconnected = asyncio.Event()
+    reader = asyncio.create_task(_read_frames(websocket, incoming, disconnected))
 
     try:
         while True:
             # Receive message from client
-            data = await websocket.receive_text()
+            data = await incoming.get()
+            if data is None:
+                break
 
             try:
                 message_data = json.loads(data)
                 message_type = message_data.get("type", "chat_message")
-                print(message_data, "----message data---")
+                logger.debug("WebSocket message from %s: %s", client_id, message_data)
                 if message_type == "chat_message":
                     user_message = message_data.get("data", {}).get("message", "")
-                    print(user_message, "[[[[[[[[[[[[[[[]]]]]]]]]]]]]]]")
                     if user_message.strip():
                         # Send typing indicator
                         await manager.send_personal_message(
@@ -147,10 +333,63 @@ async def websocket_endpoint(websocket: WebSocket):
                             websocket,
                         )
 
-                        # Process message with agent
-                        agent_response = await task_agent.process_message(user_message)
+                        async def send_chunk(delta: str):
+                            await manager.send_personal_message(
+                                {
+                                    "type": "agent_response_chunk",
+                                    "data": {"delta": delta},
+                                    "timestamp": datetime.utcnow().isoformat(),
+                                },
+                                websocket,
+                            )
+
+                        async def send_queued(position: int):
+                            await manager.send_personal_message(
+                                {
+                                    "type": "agent_queued",
+                                    "data": {
+                                        "position": position,
+                                        "message": f"The assistant is busy, your message is number {position} in line.",
+                                    },
+                                    "timestamp": datetime.utcnow().isoformat(),
+                                },
+                                websocket,
+                            )
+
+                        async def run_turn():
+                            # Process message with agent, streaming reply tokens
+                            agent = await get_agent()
+                            return agent, await agent.process_message(
+                                user_message,
+                                on_token=send_chunk,
+                                conversation_id=conversation_id,
+                            )
+
+                        turn = asyncio.create_task(
+                            agent_queue.run(client_id, run_turn, on_queued=send_queued)
+                        )
+                        try:
+                            outcome = await _run_while_connected(turn, disconnected)
+                        except QueueFull as e:
+                            await manager.send_personal_message(
+                                {
+                                    "type": "agent_busy",
+                                    "data": {
+                                        "message": "The assistant is busy right now. Please try again in a moment.",
+                                        "reason": str(e),
+                                        "queue_depth": agent_queue.depth(),
+                                    },
+                                    "timestamp": datetime.utcnow().isoformat(),
+                                },
+                                websocket,
+                            )
+                            continue
+                        if outcome is None:
+                            logger.info("Client disconnected; chat turn cancelled")
+                            break
+                        agent, agent_response = outcome
 
-                        # Send agent response
+                        # Send final agent response with tool results
                         await manager.send_personal_message(
                             {
                                 "type": "agent_response",
@@ -166,7 +405,9 @@ async def websocket_endpoint(websocket: WebSocket):
                         )
 
                         # If tasks were modified, broadcast task update to all clients
-                        if agent_response.get("tool_results"):
+                        if agent_response.get("tool_results") or agent_response.get(
+                            "timed_out"
+                        ):
                             await manager.broadcast(
                                 {
                                     "type": "task_list_update",
@@ -196,11 +437,13 @@ async def websocket_endpoint(websocket: WebSocket):
                     websocket,
                 )
 
-    except WebSocketDisconnect:
-        manager.disconnect(websocket)
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
+    finally:
+        reader.cancel()
         manager.disconnect(websocket)
+        if agent is not None:
+            agent.end_conversation(conversation_id)
 
 
 # Health check endpoint
@@ -213,6 +456,46 @@ async def health_check():
     }
 
 
+# Runtime metrics (fast-path bypass rate, cache hits, ...)
+@app.get("/metrics")
+async def get_metrics():
+    return {
+        **metrics.snapshot(),
+        "agent_queue": agent_queue.stats(),
+        "startup": startup_timer.report(),
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+def require_admin(request: Request) -> None:
+    """Admin endpoints: 404 unless ADMIN_TOKEN is set, 401 without it."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), settings.admin_token.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+# Recent agent turn traces (node/tool spans, token counts), newest first
+@app.get("/admin/traces", dependencies=[Depends(require_admin)])
+async def list_traces(limit: int = Query(50, ge=1, le=1000)):
+    return {"traces": trace_buffer.recent(limit)}
+
+
+@app.get("/admin/traces/{trace_id}", dependencies=[Depends(require_admin)])
+async def get_trace(trace_id: str):
+    trace = trace_buffer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
+
+
 # Root endpoint
 @app.get("/")
 async def root():
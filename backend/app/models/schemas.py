@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -40,6 +40,37 @@ class TaskResponse(TaskBase):
     class Config:
         from_attributes = True
 
+class TaskFilter(BaseModel):
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    search: Optional[str] = None
+    overdue: Optional[bool] = None
+
+class BulkTaskCreate(BaseModel):
+    # Items are validated one at a time (as TaskCreate), so an invalid item
+    # is reported on its own instead of rejecting the whole request
+    tasks: List[Dict[str, Any]]
+    atomic: bool = False  # Reject the whole batch if any item is invalid
+
+class BulkTaskSelection(BaseModel):
+    ids: Optional[List[int]] = None
+    filter: Optional[TaskFilter] = None
+    all_tasks: bool = False  # Required to select every task without ids/filter
+
+class BulkTaskUpdate(BulkTaskSelection):
+    changes: TaskUpdate
+
+class BulkItemError(BaseModel):
+    index: int  # Position in the request's tasks or ids
+    id: Optional[int] = None
+    error: str
+
+class BulkTaskResponse(BaseModel):
+    count: int
+    tasks: List[TaskResponse] = []
+    task_ids: List[int] = []
+    errors: List[BulkItemError] = []
+
 class ChatMessage(BaseModel):
     message: str
     response: Optional[str] = None
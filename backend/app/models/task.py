@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, Enum, Index, text
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from app.db.database import Base
 import enum
@@ -16,8 +17,24 @@ class TaskPriority(str, enum.Enum):
     HIGH = "high"
     URGENT = "urgent"
 
+# SQLite's CURRENT_TIMESTAMP has no fractional seconds; binding created_at
+# values the same way keeps keyset comparisons against cursors exact
+_SQLITE_TIMESTAMP = sqlite.DATETIME(
+    storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+)
+
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Keyset pagination: ORDER BY created_at DESC, id DESC
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        # Overdue count in the stats summary: only open tasks with a due date
+        Index(
+            "ix_tasks_open_due_date", "due_date",
+            postgresql_where=text("status <> 'DONE'"),
+            sqlite_where=text("status <> 'DONE'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String(255), nullable=False, index=True)
@@ -25,7 +42,10 @@ class Task(Base):
     status = Column(Enum(TaskStatus), default=TaskStatus.PENDING, nullable=False)
     priority = Column(Enum(TaskPriority), default=TaskPriority.MEDIUM, nullable=False)
     due_date = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(
+        DateTime(timezone=True).with_variant(_SQLITE_TIMESTAMP, "sqlite"),
+        server_default=func.now()
+    )
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     def to_dict(self):
@@ -39,3 +59,14 @@ class Task(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+
+class TaskCounter(Base):
+    """
+    A row count kept in step with every task write ("total", "status:done",
+    "priority:high", ...), see app/db/task_stats.py.
+    """
+    __tablename__ = "task_counters"
+
+    name = Column(String(32), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
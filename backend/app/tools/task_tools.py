@@ -1,11 +1,24 @@
 from typing import Optional, List, Dict, Any
+from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_core.tools import tool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, insert, delete
 from sqlalchemy.orm import selectinload
 from app.models.task import Task, TaskStatus, TaskPriority
 from app.models.schemas import TaskCreate, TaskUpdate
 from app.db.database import async_session
+from app.core.config import settings
+from app.db.pagination import (
+    newest_first_page,
+    page_size,
+    ranked_page,
+    split_page,
+    split_ranked_page,
+)
+from app.db.search import detect_full_text_search, task_filters, text_search
+from app.db.task_stats import record_created, record_deleted, update_tasks
+from app.db.unit_of_work import task_session, commit_task_write
+from app.tools.title_resolver import TitleResolution, resolve_task_identifier
 from datetime import datetime, timedelta
 import json
 import asyncio
@@ -36,7 +49,7 @@ async def create_task(
         JSON string with task creation result
     """
     try:
-        async with async_session() as session:
+        async with task_session() as session:
             # Parse due_date if provided
             parsed_due_date = None
             if due_date:
@@ -46,18 +59,20 @@ async def create_task(
             if priority not in ["low", "medium", "high", "urgent"]:
                 priority = "medium"
 
-            # Create new task
-            new_task = Task(
-                title=title,
-                description=description,
-                priority=TaskPriority(priority),
-                due_date=parsed_due_date,
-                status=TaskStatus.PENDING,
+            # Create new task; RETURNING brings back the id and server defaults
+            new_task = await session.scalar(
+                insert(Task)
+                .values(
+                    title=title,
+                    description=description,
+                    priority=TaskPriority(priority),
+                    due_date=parsed_due_date,
+                    status=TaskStatus.PENDING,
+                )
+                .returning(Task)
             )
-
-            session.add(new_task)
-            await session.commit()
-            await session.refresh(new_task)
+            await record_created(session, [new_task])
+            await commit_task_write(session)
 
             result = {
                 "success": True,
@@ -101,29 +116,13 @@ async def update_task(
         JSON string with update result
     """
     try:
-        async with async_session() as session:
-            # Find task by ID or title
-            task = None
-            if task_identifier.isdigit():
-                # Search by ID
-                task_id = int(task_identifier)
-                result = await session.execute(select(Task).filter(Task.id == task_id))
-                task = result.scalar_one_or_none()
-            else:
-                # Search by title (case-insensitive, partial match)
-                result = await session.execute(
-                    select(Task).filter(Task.title.ilike(f"%{task_identifier}%"))
+        async with task_session() as session:
+            # Find task by ID or (fuzzy) title
+            resolution = await resolve_task_identifier(session, task_identifier)
+            if resolution.task_id is None:
+                return json.dumps(
+                    unresolved_task_result(task_identifier, resolution, task=None)
                 )
-                task = result.scalar_one_or_none()
-
-            if not task:
-                result = {
-                    "success": False,
-                    "message": f"Task '{task_identifier}' not found",
-                    "task_id": None,
-                    "task": None,
-                }
-                return json.dumps(result)
 
             # Update fields if provided
             updates = {}
@@ -139,14 +138,27 @@ async def update_task(
                 updates["due_date"] = parse_due_date(due_date)
 
             if updates:
+                # Update and read back the task in one UPDATE ... RETURNING
                 updates["updated_at"] = datetime.utcnow()
-                await session.execute(
-                    update(Task).where(Task.id == task.id).values(**updates)
+                updated = await update_tasks(
+                    session, [Task.id == resolution.task_id], updates
+                )
+                task = updated[0] if updated else None
+            else:
+                task = await session.scalar(
+                    select(Task).where(Task.id == resolution.task_id)
                 )
-                await session.commit()
 
-                # Refresh task to get updated data
-                await session.refresh(task)
+            if not task:
+                result = {
+                    "success": False,
+                    "message": f"Task '{task_identifier}' not found",
+                    "task_id": None,
+                    "task": None,
+                }
+                return json.dumps(result)
+            if updates:
+                await commit_task_write(session)
 
             result = {
                 "success": True,
@@ -178,20 +190,22 @@ async def delete_task(task_identifier: str) -> str:
         JSON string with deletion result
     """
     try:
-        async with async_session() as session:
-            # Find task by ID or title
-            task = None
-            if task_identifier.isdigit():
-                task_id = int(task_identifier)
-                result = await session.execute(select(Task).filter(Task.id == task_id))
-                task = result.scalar_one_or_none()
-            else:
-                result = await session.execute(
-                    select(Task).filter(Task.title.ilike(f"%{task_identifier}%"))
+        async with task_session() as session:
+            # Find task by ID or (fuzzy) title
+            resolution = await resolve_task_identifier(session, task_identifier)
+            if resolution.task_id is None:
+                return json.dumps(unresolved_task_result(task_identifier, resolution))
+
+            deleted = (
+                await session.execute(
+                    delete(Task)
+                    .where(Task.id == resolution.task_id)
+                    .returning(Task.id, Task.title, Task.status, Task.priority)
+                    .execution_options(synchronize_session=False)
                 )
-                task = result.scalar_one_or_none()
+            ).one_or_none()
 
-            if not task:
+            if not deleted:
                 result = {
                     "success": False,
                     "message": f"Task '{task_identifier}' not found",
@@ -199,11 +213,9 @@ async def delete_task(task_identifier: str) -> str:
                 }
                 return json.dumps(result)
 
-            task_title = task.title
-            task_id = task.id
-
-            await session.execute(delete(Task).where(Task.id == task.id))
-            await session.commit()
+            task_id, task_title = deleted.id, deleted.title
+            await record_deleted(session, [deleted])
+            await commit_task_write(session)
 
             result = {
                 "success": True,
@@ -226,21 +238,23 @@ async def list_tasks(
     status_filter: Optional[str] = None,
     priority_filter: Optional[str] = None,
     limit: Optional[int] = 20,
+    cursor: Optional[str] = None,
 ) -> str:
     """
-    List all tasks with optional filtering.
+    List all tasks with optional filtering, newest first.
 
     Args:
         status_filter: Filter by status - pending, in_progress, done, cancelled (optional)
         priority_filter: Filter by priority - low, medium, high, urgent (optional)
-        limit: Maximum number of tasks to return (default: 20)
+        limit: Maximum number of tasks to return (default: 20, at most 100)
+        cursor: next_cursor from a previous result, to get the following page (optional)
 
     Returns:
         JSON string with list of tasks
     """
     try:
-        async with async_session() as session:
-            query = select(Task).order_by(Task.created_at.desc())
+        async with task_session(writes=False) as session:
+            query = select(Task)
 
             # Apply filters
             if status_filter and status_filter in [
@@ -259,12 +273,12 @@ async def list_tasks(
             ]:
                 query = query.filter(Task.priority == TaskPriority(priority_filter))
 
-            # Apply limit
-            if limit:
-                query = query.limit(limit)
+            # Apply ordering and pagination
+            limit = page_size(limit, 20)
+            query = newest_first_page(query, cursor, limit)
 
             result = await session.execute(query)
-            tasks = result.scalars().all()
+            tasks, next_cursor = split_page(result.scalars().all(), limit)
 
             task_list = [task.to_dict() for task in tasks]
 
@@ -273,6 +287,7 @@ async def list_tasks(
                 "message": f"Retrieved {len(task_list)} tasks",
                 "count": len(task_list),
                 "tasks": task_list,
+                "next_cursor": next_cursor,
             }
             return json.dumps(result)
 
@@ -292,54 +307,42 @@ async def filter_tasks(
     status: Optional[str] = None,
     priority: Optional[str] = None,
     overdue: Optional[bool] = None,
+    limit: Optional[int] = 50,
+    cursor: Optional[str] = None,
 ) -> str:
     """
-    Filter tasks based on various criteria including text search.
+    Filter tasks based on various criteria including text search. Results
+    are newest first, or most relevant first when searching.
 
     Args:
-        search_text: Search in task title and description (optional)
+        search_text: Words to find in task titles and descriptions; each matches the start of a word (optional)
         status: Filter by status - pending, in_progress, done, cancelled (optional)
         priority: Filter by priority - low, medium, high, urgent (optional)
         overdue: Filter overdue tasks (True) or not overdue (False) (optional)
+        limit: Maximum number of tasks to return (default: 50, at most 100)
+        cursor: next_cursor from a previous result, to get the following page (optional)
 
     Returns:
         JSON string with filtered tasks
     """
     try:
-        async with async_session() as session:
+        async with task_session(writes=False) as session:
             query = select(Task)
 
-            # Text search in title and description
-            if search_text:
-                search_pattern = f"%{search_text}%"
-                query = query.filter(
-                    (Task.title.ilike(search_pattern))
-                    | (Task.description.ilike(search_pattern))
-                )
-
-            # Status filter
-            if status and status in ["pending", "in_progress", "done", "cancelled"]:
-                query = query.filter(Task.status == TaskStatus(status))
+            # Searches are ordered by relevance, other filters newest first
+            await detect_full_text_search(session)
+            query = query.filter(*task_filters(search_text, status, priority, overdue))
+            ranked = text_search(search_text) if search_text else None
 
-            # Priority filter
-            if priority and priority in ["low", "medium", "high", "urgent"]:
-                query = query.filter(Task.priority == TaskPriority(priority))
-
-            # Overdue filter
-            if overdue is not None:
-                now = datetime.utcnow()
-                if overdue:
-                    query = query.filter(
-                        Task.due_date < now, Task.status != TaskStatus.DONE
-                    )
-                else:
-                    query = query.filter(
-                        (Task.due_date >= now) | (Task.due_date.is_(None))
-                    )
-
-            query = query.order_by(Task.created_at.desc())
-            result = await session.execute(query)
-            tasks = result.scalars().all()
+            limit = page_size(limit, 50)
+            if ranked:
+                query = ranked_page(query, ranked[1], cursor, limit)
+                result = await session.execute(query)
+                tasks, next_cursor = split_ranked_page(result.all(), limit)
+            else:
+                query = newest_first_page(query, cursor, limit)
+                result = await session.execute(query)
+                tasks, next_cursor = split_page(result.scalars().all(), limit)
 
             task_list = [task.to_dict() for task in tasks]
 
@@ -348,6 +351,7 @@ async def filter_tasks(
                 "message": f"Found {len(task_list)} tasks matching criteria",
                 "count": len(task_list),
                 "tasks": task_list,
+                "next_cursor": next_cursor,
             }
             return json.dumps(result)
 
@@ -361,6 +365,290 @@ async def filter_tasks(
         return json.dumps(result)
 
 
+class NewTaskSpec(BaseModel):
+    """A task to create in a bulk request."""
+
+    title: str = Field(description="The title/name of the task")
+    description: Optional[str] = Field(None, description="Detailed description")
+    priority: Optional[str] = Field(
+        "medium", description="Task priority - low, medium, high, urgent"
+    )
+    due_date: Optional[str] = Field(
+        None, description="Due date in ISO format or natural language"
+    )
+
+
+@tool
+async def bulk_create_tasks(tasks: List[NewTaskSpec]) -> str:
+    """
+    Create several tasks at once. Prefer this over repeated create_task calls.
+
+    Args:
+        tasks: The tasks to create, each with a title and optional description, priority and due_date
+
+    Returns:
+        JSON string with the created tasks
+    """
+    try:
+        if not tasks:
+            return json.dumps(
+                {"success": False, "message": "No tasks given", "count": 0, "tasks": []}
+            )
+        if len(tasks) > settings.bulk_max_items:
+            return json.dumps(
+                {
+                    "success": False,
+                    "message": f"At most {settings.bulk_max_items} tasks can be created at once",
+                    "count": 0,
+                    "tasks": [],
+                }
+            )
+
+        rows = [
+            {
+                "title": spec.title,
+                "description": spec.description,
+                "priority": TaskPriority(
+                    spec.priority
+                    if spec.priority in ["low", "medium", "high", "urgent"]
+                    else "medium"
+                ),
+                "due_date": parse_due_date(spec.due_date) if spec.due_date else None,
+                "status": TaskStatus.PENDING,
+            }
+            for spec in tasks
+        ]
+
+        async with task_session() as session:
+            # One multi-row INSERT ... RETURNING; render_nulls keeps rows with
+            # and without optional fields in the same statement
+            result = await session.scalars(
+                insert(Task).returning(Task).execution_options(render_nulls=True),
+                rows,
+            )
+            # RETURNING order is unspecified; ids follow insertion order
+            created = sorted(result.all(), key=lambda task: task.id)
+            await record_created(session, created)
+            await commit_task_write(session)
+
+            task_list = [task.to_dict() for task in created]
+            result = {
+                "success": True,
+                "message": f"Created {len(task_list)} tasks",
+                "count": len(task_list),
+                "tasks": task_list,
+            }
+            return json.dumps(result)
+
+    except Exception as e:
+        result = {
+            "success": False,
+            "message": f"Error creating tasks: {str(e)}",
+            "count": 0,
+            "tasks": [],
+        }
+        return json.dumps(result)
+
+
+def _bulk_target(
+    task_ids: Optional[List[int]],
+    search_text: Optional[str],
+    status_filter: Optional[str],
+    priority_filter: Optional[str],
+    overdue: Optional[bool],
+    all_tasks: bool,
+) -> Optional[List]:
+    """
+    WHERE clauses selecting the tasks of a bulk update/delete.
+
+    Returns None when nothing narrows the selection and ``all_tasks`` is not
+    set, so a missing argument never touches every task by accident.
+    """
+    conditions = task_filters(search_text, status_filter, priority_filter, overdue)
+    if task_ids:
+        conditions.append(Task.id.in_(task_ids))
+    if not conditions and not all_tasks:
+        return None
+    return conditions
+
+
+@tool
+async def bulk_update_tasks(
+    task_ids: Optional[List[int]] = None,
+    search_text: Optional[str] = None,
+    status_filter: Optional[str] = None,
+    priority_filter: Optional[str] = None,
+    overdue: Optional[bool] = None,
+    all_tasks: bool = False,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    due_date: Optional[str] = None,
+) -> str:
+    """
+    Update many tasks at once, selected by ID list and/or filters. Prefer this
+    over repeated update_task calls, e.g. "mark all low priority tasks as cancelled".
+
+    Args:
+        task_ids: IDs of the tasks to update (optional)
+        search_text: Only tasks whose title or description has words starting with these (optional)
+        status_filter: Only tasks with this status - pending, in_progress, done, cancelled (optional)
+        priority_filter: Only tasks with this priority - low, medium, high, urgent (optional)
+        overdue: Only overdue tasks (True) or not overdue tasks (False) (optional)
+        all_tasks: Set to true to update every task when no IDs or filters are given
+        status: New status - pending, in_progress, done, cancelled (optional)
+        priority: New priority - low, medium, high, urgent (optional)
+        due_date: New due date in ISO format or natural language (optional)
+
+    Returns:
+        JSON string with the updated tasks
+    """
+    try:
+        conditions = _bulk_target(
+            task_ids, search_text, status_filter, priority_filter, overdue, all_tasks
+        )
+        if conditions is None:
+            return json.dumps(
+                {
+                    "success": False,
+                    "message": "Specify task_ids or a filter (or all_tasks) to choose the tasks to update",
+                    "count": 0,
+                    "tasks": [],
+                }
+            )
+
+        updates = {}
+        if status and status in ["pending", "in_progress", "done", "cancelled"]:
+            updates["status"] = TaskStatus(status)
+        if priority and priority in ["low", "medium", "high", "urgent"]:
+            updates["priority"] = TaskPriority(priority)
+        if due_date:
+            updates["due_date"] = parse_due_date(due_date)
+        if not updates:
+            return json.dumps(
+                {
+                    "success": False,
+                    "message": "No valid status, priority or due_date to set",
+                    "count": 0,
+                    "tasks": [],
+                }
+            )
+        updates["updated_at"] = datetime.utcnow()
+
+        async with task_session() as session:
+            # One UPDATE ... RETURNING for every matching row
+            updated = await update_tasks(session, conditions, updates)
+            if updated:
+                await commit_task_write(session)
+
+            task_list = [task.to_dict() for task in updated]
+            result = {
+                "success": True,
+                "message": f"Updated {len(task_list)} tasks",
+                "count": len(task_list),
+                "tasks": task_list,
+            }
+            return json.dumps(result)
+
+    except Exception as e:
+        result = {
+            "success": False,
+            "message": f"Error updating tasks: {str(e)}",
+            "count": 0,
+            "tasks": [],
+        }
+        return json.dumps(result)
+
+
+@tool
+async def bulk_delete_tasks(
+    task_ids: Optional[List[int]] = None,
+    search_text: Optional[str] = None,
+    status_filter: Optional[str] = None,
+    priority_filter: Optional[str] = None,
+    overdue: Optional[bool] = None,
+    all_tasks: bool = False,
+) -> str:
+    """
+    Delete many tasks at once, selected by ID list and/or filters. Prefer this
+    over repeated delete_task calls, e.g. "delete all completed tasks".
+
+    Args:
+        task_ids: IDs of the tasks to delete (optional)
+        search_text: Only tasks whose title or description has words starting with these (optional)
+        status_filter: Only tasks with this status - pending, in_progress, done, cancelled (optional)
+        priority_filter: Only tasks with this priority - low, medium, high, urgent (optional)
+        overdue: Only overdue tasks (True) or not overdue tasks (False) (optional)
+        all_tasks: Set to true to delete every task when no IDs or filters are given
+
+    Returns:
+        JSON string with the IDs and titles of the deleted tasks
+    """
+    try:
+        conditions = _bulk_target(
+            task_ids, search_text, status_filter, priority_filter, overdue, all_tasks
+        )
+        if conditions is None:
+            return json.dumps(
+                {
+                    "success": False,
+                    "message": "Specify task_ids or a filter (or all_tasks) to choose the tasks to delete",
+                    "count": 0,
+                    "task_ids": [],
+                }
+            )
+
+        async with task_session() as session:
+            # One DELETE ... RETURNING for every matching row
+            result = await session.execute(
+                delete(Task)
+                .where(*conditions)
+                .returning(Task.id, Task.title, Task.status, Task.priority)
+                .execution_options(synchronize_session=False)
+            )
+            deleted = result.all()
+            if deleted:
+                await record_deleted(session, deleted)
+                await commit_task_write(session)
+
+            result = {
+                "success": True,
+                "message": f"Deleted {len(deleted)} tasks",
+                "count": len(deleted),
+                "task_ids": [row.id for row in deleted],
+                "titles": [row.title for row in deleted],
+            }
+            return json.dumps(result)
+
+    except Exception as e:
+        result = {
+            "success": False,
+            "message": f"Error deleting tasks: {str(e)}",
+            "count": 0,
+            "task_ids": [],
+        }
+        return json.dumps(result)
+
+
+def unresolved_task_result(
+    task_identifier: str, resolution: TitleResolution, **fields: Any
+) -> Dict[str, Any]:
+    """Failure result for an identifier that named no task, or several."""
+    if resolution.ambiguous:
+        message = (
+            f"'{task_identifier}' matches several tasks: "
+            f"{resolution.describe_candidates()}. Which one did you mean?"
+        )
+    else:
+        message = f"Task '{task_identifier}' not found"
+    return {
+        "success": False,
+        "message": message,
+        "task_id": None,
+        "candidates": resolution.candidates,
+        **fields,
+    }
+
+
 def parse_due_date(due_date_str: str) -> Optional[datetime]:
     """Parse natural language due date strings into datetime objects."""
     if not due_date_str:
@@ -395,4 +683,22 @@ def parse_due_date(due_date_str: str) -> Optional[datetime]:
 
 
 # Export all tools
-TASK_TOOLS = [create_task, update_task, delete_task, list_tasks, filter_tasks]
+TASK_TOOLS = [
+    create_task,
+    update_task,
+    delete_task,
+    list_tasks,
+    filter_tasks,
+    bulk_create_tasks,
+    bulk_update_tasks,
+    bulk_delete_tasks,
+]
+
+# Name -> tool lookup
+TOOL_REGISTRY = {tool.name: tool for tool in TASK_TOOLS}
+
+# Tools that never modify tasks
+READ_ONLY_TOOLS = frozenset({"list_tasks", "filter_tasks"})
+
+# Writes that select their rows by filter, so they may touch any task
+SET_WRITE_TOOLS = frozenset({"bulk_update_tasks", "bulk_delete_tasks"})
@@ -0,0 +1,416 @@
+import asyncio
+import itertools
+import logging
+import math
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, func, literal, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.task_version import get_task_version
+from app.db.database import async_session
+from app.models.task import Task
+
+logger = logging.getLogger(__name__)
+
+# The best match must lead the runner-up by this much to be picked on its own
+_MATCH_MARGIN = 0.1
+
+# Titles scored per in-process lookup
+_CANDIDATE_BUDGET = 128
+
+# Runs of alphanumeric characters (str.isalnum), which trigrams are taken from
+_WORD = re.compile(r"[^\W_]+")
+
+# Rows fetched per round trip when (re)building the in-process index
+_REBUILD_BATCH = 2000
+
+# New tasks a lookup adds to the in-process index itself; more (a bulk
+# import) are left to a full rebuild in the background
+_CATCH_UP_LIMIT = 500
+
+# Newest tasks a lookup scores beyond the index (its turn's own inserts)
+_OVERLAY_LIMIT = 100
+
+
+@dataclass
+class TitleResolution:
+    """
+    Outcome of resolving a task identifier: the chosen ``task_id``, or the
+    ranked ``candidates`` (id, title, score) when the text is ambiguous.
+    """
+
+    task_id: Optional[int] = None
+    candidates: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def ambiguous(self) -> bool:
+        return self.task_id is None and len(self.candidates) > 1
+
+    def describe_candidates(self) -> str:
+        return ", ".join(f"#{c['id']} '{c['title']}'" for c in self.candidates)
+
+
+def trigrams(text_value: str) -> Set[str]:
+    """pg_trgm-style trigrams: lower-cased words padded with two leading spaces."""
+    grams = set()
+    for word in _WORD.findall(text_value.lower()):
+        padded = f"  {word} "
+        grams.update([padded[i : i + 3] for i in range(len(padded) - 2)])
+    return grams
+
+
+def _padded_words(text_value: str) -> str:
+    # Contains exactly the trigrams of ``text_value``, plus a few ending in two
+    # spaces (across word boundaries) that ``trigrams`` never produces
+    return "".join(f"  {word} " for word in _WORD.findall(text_value.lower()))
+
+
+def _insert(
+    titles: Dict[int, str],
+    exact: Dict[str, Tuple[int, ...]],
+    postings: Dict[str, "array[int]"],
+    task_id: int,
+    title: str,
+) -> None:
+    # ``task_id`` must be above every id already indexed: the posting lists
+    # stay sorted by appending
+    titles[task_id] = title
+    key = title.strip().lower()
+    exact[key] = exact.get(key, ()) + (task_id,)
+    for gram in trigrams(title):
+        posting = postings.get(gram)
+        if posting is None:
+            posting = postings[gram] = array("q")
+        posting.append(task_id)
+
+
+def _rank_key(query: str) -> Any:
+    # Among equal scores prefer the title closest in length to the query
+    return lambda row: (-row[2], abs(len(row[1]) - len(query)), row[0])
+
+
+def _contains(posting: "array[int]", task_id: int) -> bool:
+    index = bisect_left(posting, task_id)
+    return index < len(posting) and posting[index] == task_id
+
+
+class TitleIndex:
+    """
+    In-process trigram index over task titles, for databases without pg_trgm.
+
+    Scores approximate pg_trgm's ``word_similarity``: the share of the
+    query's trigrams found in the title. At most ``_CANDIDATE_BUDGET``
+    titles are scored per lookup, so a vague query on a large table costs
+    the same as a precise one (it is ambiguous either way). ``rebuild``
+    loads the whole table as of one task ``version``; ``add`` then appends
+    tasks created since (ids above ``max_id``) and moves ``version`` on.
+    Posting lists are arrays of ids in ascending order rather than sets,
+    which the garbage collector would otherwise have to walk (millions of
+    entries) on every full collection, even while a rebuild is under way.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._titles: Dict[int, str] = {}
+        self._exact: Dict[str, Tuple[int, ...]] = {}
+        self._postings: Dict[str, "array[int]"] = {}
+        self.version: Optional[int] = None
+        self.max_id = 0
+        self.rebuilt_version: Optional[int] = None
+        self.rebuilt_at = 0.0  # time.monotonic() of the last rebuild
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def rebuild(self, rows: Iterable[Tuple[int, str]], version: Optional[int]) -> None:
+        """Replace the index with ``rows`` (id, title), given in id order."""
+        titles: Dict[int, str] = {}
+        exact: Dict[str, Tuple[int, ...]] = {}
+        postings: Dict[str, "array[int]"] = {}
+        for task_id, title in rows:
+            _insert(titles, exact, postings, task_id, title)
+        with self._lock:
+            self._titles, self._exact, self._postings = titles, exact, postings
+            self.version = self.rebuilt_version = version
+            self.rebuilt_at = time.monotonic()
+            self.max_id = max(titles, default=0)
+
+    def add(self, rows: Iterable[Tuple[int, str]], version: Optional[int]) -> int:
+        """
+        Append ``rows`` (id, title) created since the index was built, in id
+        order, and mark it current as of ``version``. Rows it already holds
+        (ids up to ``max_id``) are skipped. Returns how many were added.
+        """
+        added = 0
+        with self._lock:
+            for task_id, title in rows:
+                if task_id > self.max_id:
+                    _insert(self._titles, self._exact, self._postings, task_id, title)
+                    self.max_id = task_id
+                    added += 1
+            self.version = version
+        return added
+
+    def search(
+        self, query: str, limit: int, min_score: float
+    ) -> List[Tuple[int, str, float]]:
+        """Top ``limit`` (id, title, score) scoring at least ``min_score``."""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        needed = max(1, math.ceil(min_score * len(query_grams)))
+        with self._lock:
+            titles, exact, postings = self._titles, self._exact, self._postings
+
+        empty = array("q")
+        lists = sorted((postings.get(g, empty) for g in query_grams), key=len)
+        candidates = set(exact.get(query.strip().lower(), ()))
+
+        # Titles containing every trigram first: intersect the rarest lists
+        # until few enough remain (unless even the rarest is huge)
+        complete: Iterable[int] = lists[0]
+        if len(lists[0]) <= _CANDIDATE_BUDGET * 64:
+            complete = set(complete)
+            for posting in lists[1:]:
+                if len(complete) <= _CANDIDATE_BUDGET:
+                    break
+                if len(complete) * 16 < len(posting):
+                    complete = {i for i in complete if _contains(posting, i)}
+                else:
+                    complete = complete.intersection(posting)
+        candidates.update(itertools.islice(complete, _CANDIDATE_BUDGET))
+
+        # Then partial matches: a title sharing ``needed`` trigrams contains
+        # one of the rarest ``len - needed + 1``, so only those are scanned
+        for posting in lists[: len(lists) - needed + 1]:
+            room = _CANDIDATE_BUDGET - len(candidates)
+            if room <= 0:
+                break
+            candidates.update(itertools.islice(posting, room))
+
+        ranked = []
+        for task_id in candidates:
+            padded = _padded_words(titles[task_id])
+            shared = sum(1 for gram in query_grams if gram in padded)
+            if shared >= needed:
+                ranked.append((task_id, titles[task_id], shared / len(query_grams)))
+        ranked.sort(key=_rank_key(query))
+        return ranked[:limit]
+
+
+# Fallback index shared by every tool call in the process
+title_index = TitleIndex()
+
+_trigram_support: Optional[bool] = None
+
+
+async def _uses_trigram_index(session: AsyncSession) -> bool:
+    """Whether to rank in Postgres: pg_trgm installed and not overridden."""
+    global _trigram_support
+    if settings.title_search_backend == "memory":
+        return False
+    if session.bind.dialect.name != "postgresql":
+        return False
+    if _trigram_support is None:
+        installed = await session.scalar(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        )
+        _trigram_support = bool(installed)
+        if not _trigram_support:
+            logger.warning(
+                "pg_trgm is not installed (run the Alembic migrations); "
+                "resolving task titles with the in-process index"
+            )
+    return _trigram_support
+
+
+async def _search_postgres(
+    session: AsyncSession, query: str, limit: int
+) -> List[Tuple[int, str, float]]:
+    # "<%" and "<<->" are served by the ix_tasks_title_trgm GiST index, which
+    # returns rows in distance order, so only about ``limit`` rows are
+    # visited; whole-title distance breaks ties in favour of exact titles.
+    # "<%" keeps scores of at least pg_trgm.word_similarity_threshold, which
+    # every connection sets to title_match_min_score (app/db/database.py)
+    term = literal(query)
+    rows = await session.execute(
+        select(Task.id, Task.title, func.word_similarity(term, Task.title))
+        .where(term.op("<%")(Task.title))
+        .order_by(term.op("<<->")(Task.title), term.op("<->")(Task.title), Task.id)
+        .limit(limit)
+    )
+    return [(task_id, title, float(score)) for task_id, title, score in rows]
+
+
+async def _rebuild_title_index() -> None:
+    """Reload ``title_index`` from the tasks table without blocking the loop."""
+    version = await get_task_version()  # before the query: a later write re-stales it
+    rows: List[Tuple[int, str]] = []
+    async with async_session() as session:
+        result = await session.stream(
+            select(Task.id, Task.title)
+            .order_by(Task.id)
+            .execution_options(yield_per=_REBUILD_BATCH)
+        )
+        async for partition in result.partitions():
+            # Plain tuples, which the garbage collector soon stops tracking
+            rows.extend(map(tuple, partition))
+    start = time.perf_counter()
+    await asyncio.to_thread(title_index.rebuild, rows, version)
+    metrics.observe("title_index.rebuild", (time.perf_counter() - start) * 1000)
+
+
+_rebuild: Optional[asyncio.Task] = None
+
+
+def _log_rebuild_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Rebuilding the task title index failed: {task.exception()}")
+
+
+def _start_rebuild() -> None:
+    global _rebuild
+    if _rebuild is None or _rebuild.done():
+        _rebuild = asyncio.create_task(_rebuild_title_index())
+        _rebuild.add_done_callback(_log_rebuild_failure)
+
+
+async def _catch_up_title_index(version: int) -> None:
+    """
+    Add the tasks committed since ``title_index`` was last updated (ids
+    above ``max_id``), or start a rebuild when there are too many.
+    """
+    async with async_session() as session:
+        rows = (
+            await session.execute(
+                select(Task.id, Task.title)
+                .where(Task.id > title_index.max_id)
+                .order_by(Task.id)
+                .limit(_CATCH_UP_LIMIT + 1)
+            )
+        ).all()
+    if len(rows) > _CATCH_UP_LIMIT:
+        _start_rebuild()
+        return
+    metrics.increment("title_index.added", title_index.add(rows, version))
+
+
+async def _search_memory(
+    session: AsyncSession, query: str, limit: int
+) -> List[Tuple[int, str, float]]:
+    """
+    Rank titles with ``title_index``, adjusted to the tasks table as
+    ``session`` sees it (including a turn's own uncommitted writes).
+
+    Only the first lookup waits for the index to be built. After a write,
+    the next lookup adds the tasks created since (a primary key range
+    read) rather than reloading the table; full rebuilds run in the
+    background (streamed, then indexed in a thread) at most every
+    ``title_index_rebuild_interval``, or after a bulk import, while lookups
+    keep using the current index. The candidates, and the newest tasks
+    beyond the index, are re-checked against their titles as ``session``
+    sees them, which drops deleted tasks. A task renamed to a matching title
+    is missed until the next rebuild, as is one committed after a task with
+    a higher id was added, and tasks of a bulk import beyond the newest
+    ``_OVERLAY_LIMIT`` until its rebuild finishes.
+    """
+    query_grams = trigrams(query)
+    if not query_grams:
+        return []
+    version = await get_task_version()
+    if title_index.version is None:
+        # Nothing to serve yet
+        _start_rebuild()
+        await asyncio.shield(_rebuild)
+    elif title_index.version != version:
+        await _catch_up_title_index(version)
+
+    # Renamed tasks only reach the index through a rebuild, which runs at
+    # most every title_index_rebuild_interval after tasks were written
+    since = time.monotonic() - title_index.rebuilt_at
+    if (
+        title_index.rebuilt_version != version
+        and since >= settings.title_index_rebuild_interval
+    ):
+        _start_rebuild()
+
+    indexed = title_index.search(query, limit, settings.title_match_min_score)
+    newest = (
+        select(Task.id, Task.title)
+        .where(Task.id > title_index.max_id)
+        .order_by(Task.id.desc())
+        .limit(_OVERLAY_LIMIT)
+        .subquery()
+    )
+    current = dict(
+        (
+            await session.execute(
+                union_all(
+                    select(Task.id, Task.title).where(
+                        Task.id.in_([task_id for task_id, _, _ in indexed])
+                    ),
+                    select(newest.c.id, newest.c.title),
+                )
+            )
+        ).all()
+    )
+
+    ranked = []
+    for task_id, title in current.items():
+        score = len(query_grams & trigrams(title)) / len(query_grams)
+        if score >= settings.title_match_min_score:
+            ranked.append((task_id, title, score))
+    ranked.sort(key=_rank_key(query))
+    return ranked[:limit]
+
+
+async def resolve_task_identifier(
+    session: AsyncSession, task_identifier: str
+) -> TitleResolution:
+    """
+    Resolve the ``task_identifier`` a tool was given to one task.
+
+    A number is taken as the task ID. Text is ranked against task titles by
+    trigram word similarity; it resolves to an exact (case-insensitive)
+    title, or to the best match when it clearly beats the runner-up.
+    Otherwise the candidates are returned for the user to choose from.
+    """
+    task_identifier = task_identifier.strip()
+    if task_identifier.isdigit():
+        return TitleResolution(task_id=int(task_identifier))
+
+    limit = settings.title_match_candidates
+    if await _uses_trigram_index(session):
+        ranked = await _search_postgres(session, task_identifier, limit)
+    else:
+        ranked = await _search_memory(session, task_identifier, limit)
+
+    candidates = [
+        {"id": task_id, "title": title, "score": round(score, 3)}
+        for task_id, title, score in ranked
+        if score >= settings.title_match_min_score
+    ]
+    if not candidates:
+        return TitleResolution()
+
+    exact = [c for c in candidates if c["title"].lower() == task_identifier.lower()]
+    if len(exact) == 1:
+        return TitleResolution(task_id=exact[0]["id"], candidates=candidates)
+    if exact:
+        return TitleResolution(candidates=exact)
+
+    if (
+        len(candidates) == 1
+        or round(candidates[0]["score"] - candidates[1]["score"], 3) >= _MATCH_MARGIN
+    ):
+        return TitleResolution(task_id=candidates[0]["id"], candidates=candidates)
+    return TitleResolution(candidates=candidates)
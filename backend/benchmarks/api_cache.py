@@ -0,0 +1,106 @@
+"""
+Benchmark the read-through REST response cache on the task read endpoints.
+
+Polls the list, single-task and stats endpoints ``--polls`` times each,
+once with API_CACHE_ENABLED off (every poll queries and serialises) and
+once with it on (the first poll fills the cache, the rest are hits), and
+prints latency and SQL statements per poll plus the hit ratio. Requests go
+through the ASGI app in-process with the in-memory cache unless
+``REDIS_URL`` is set:
+
+    python -m benchmarks.api_cache --rows 5000 --polls 500
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+
+from benchmarks.common import format_summary
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    database_url = args.database_url or (
+        f"sqlite+aiosqlite:///{tempfile.gettempdir()}/api_cache.db"
+    )
+    os.environ["ASYNC_DATABASE_URL"] = database_url
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["DEBUG"] = "false"
+    os.environ["AGENT_WARMUP"] = "lazy"
+
+
+async def run(args: argparse.Namespace) -> None:
+    import httpx
+    from sqlalchemy import event, func, insert, select
+
+    from app.core.config import settings
+    from app.core.metrics import metrics
+    from app.db.database import Base, async_engine, async_session
+    from app.main import app
+    from app.models.task import Task
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_session() as db:
+        if await db.scalar(select(func.count(Task.id))) != args.rows:
+            await db.execute(Task.__table__.delete())
+            await db.execute(
+                insert(Task),
+                [
+                    {"title": f"task {i}", "description": "x" * 80}
+                    for i in range(args.rows)
+                ],
+            )
+            await db.commit()
+        task_id = await db.scalar(select(func.min(Task.id)))
+
+    statements = [0]
+
+    def count(*_args) -> None:
+        statements[0] += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://benchmark/api/v1"
+    )
+    async with client:
+        for path in [
+            f"/tasks?limit={args.limit}",
+            f"/tasks/{task_id}",
+            "/tasks/stats/summary",
+        ]:
+            for enabled in (False, True):
+                settings.api_cache_enabled = enabled
+                latencies: List[float] = []
+                statements[0] = 0
+                for _ in range(args.polls):
+                    start = time.perf_counter()
+                    response = await client.get(path)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    response.raise_for_status()
+                label = f"{path.split('?')[0]} {'cached' if enabled else 'uncached'}"
+                print(
+                    f"{format_summary(label, latencies)}  "
+                    f"sql/poll={statements[0] / args.polls:.1f}"
+                )
+    print(f"hit_ratio={metrics.snapshot()['gauges']['api.cache.hit_ratio']:.3f}")
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--database-url", default="")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
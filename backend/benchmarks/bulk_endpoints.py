@@ -0,0 +1,155 @@
+"""
+Benchmark rows/sec of the bulk task endpoints against one request per task.
+
+Creates, updates and deletes ``--rows`` tasks twice over HTTP: once with
+``POST/PUT/DELETE /tasks[/{id}]`` per task, as an importer would today, and
+once with ``POST/PATCH/DELETE /tasks/bulk`` in batches of ``--batch-size``.
+Requests go through the ASGI app in-process by default, or to a running
+server with ``--base-url``:
+
+    python -m benchmarks.bulk_endpoints --rows 5000 --batch-size 500
+    python -m benchmarks.bulk_endpoints --base-url http://localhost:8000
+
+The in-process run uses SQLite unless ``--database-url`` is given.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from benchmarks.common import format_summary
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    database_url = args.database_url or (
+        f"sqlite+aiosqlite:///{tempfile.gettempdir()}/bulk_endpoints.db"
+    )
+    os.environ["ASYNC_DATABASE_URL"] = database_url
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["DEBUG"] = "false"
+    os.environ["AGENT_WARMUP"] = "lazy"
+
+
+async def make_client(args: argparse.Namespace):
+    import httpx
+
+    if args.base_url:
+        return httpx.AsyncClient(base_url=f"{args.base_url}/api/v1", timeout=120)
+
+    from app.core.config import settings
+    from app.db.database import Base, async_engine
+    from app.main import app
+
+    settings.api_bulk_max_items = max(settings.api_bulk_max_items, args.batch_size)
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://benchmark/api/v1",
+        timeout=120,
+    )
+
+
+async def timed(
+    requests: List[Callable[[], Awaitable[Any]]], rows: int, label: str
+) -> List[Any]:
+    """Send ``requests`` one after another; print latency and rows/sec."""
+    latencies, results = [], []
+    started = time.perf_counter()
+    for send in requests:
+        start = time.perf_counter()
+        response = await send()
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        results.append(response.json())
+    elapsed = time.perf_counter() - started
+    print(f"{format_summary(label, latencies)}  rows/s={rows / elapsed:,.0f}")
+    return results
+
+
+def batches(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+async def run(args: argparse.Namespace) -> None:
+    client = await make_client(args)
+    items: List[Dict[str, Any]] = [
+        {"title": f"imported task {i}", "priority": "low"} for i in range(args.rows)
+    ]
+    print(f"rows={args.rows} batch_size={args.batch_size}")
+
+    async with client:
+        created = await timed(
+            [lambda item=item: client.post("/tasks", json=item) for item in items],
+            args.rows,
+            "single create",
+        )
+        ids = [task["id"] for task in created]
+        await timed(
+            [
+                lambda i=i: client.put(f"/tasks/{i}", json={"status": "done"})
+                for i in ids
+            ],
+            args.rows,
+            "single update",
+        )
+        await timed(
+            [lambda i=i: client.delete(f"/tasks/{i}") for i in ids],
+            args.rows,
+            "single delete",
+        )
+
+        created = await timed(
+            [
+                lambda batch=batch: client.post("/tasks/bulk", json={"tasks": batch})
+                for batch in batches(items, args.batch_size)
+            ],
+            args.rows,
+            "bulk create",
+        )
+        ids = [task_id for result in created for task_id in result["task_ids"]]
+        await timed(
+            [
+                lambda batch=batch: client.patch(
+                    "/tasks/bulk", json={"ids": batch, "changes": {"status": "done"}}
+                )
+                for batch in batches(ids, args.batch_size)
+            ],
+            args.rows,
+            "bulk update",
+        )
+        await timed(
+            [
+                lambda batch=batch: client.request(
+                    "DELETE", "/tasks/bulk", json={"ids": batch}
+                )
+                for batch in batches(ids, args.batch_size)
+            ],
+            args.rows,
+            "bulk delete",
+        )
+
+    if not args.base_url:
+        from app.db.database import async_engine
+
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--base-url", default="")
+    parser.add_argument("--database-url", default="")
+    args = parser.parse_args()
+
+    if not args.base_url:
+        configure_environment(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Shared helpers for the benchmark scripts."""
+
+import math
+from typing import Dict, List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (``pct`` in 0-100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarise latency samples (in milliseconds)."""
+    return {
+        "count": len(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples) if samples else 0.0,
+    }
+
+
+def format_summary(label: str, samples: List[float]) -> str:
+    stats = summarize(samples)
+    return (
+        f"{label:<32} n={stats['count']:<6} "
+        f"p50={stats['p50']:8.2f}ms p95={stats['p95']:8.2f}ms "
+        f"p99={stats['p99']:8.2f}ms max={stats['max']:8.2f}ms"
+    )
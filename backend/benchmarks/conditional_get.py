@@ -0,0 +1,109 @@
+"""
+Benchmark a polling client with and without conditional GETs.
+
+Polls the list, single-task and stats endpoints ``--polls`` times each,
+once refetching in full and once revalidating with ``If-None-Match``
+(the table does not change in between, as for a client whose copy is
+current), and prints latency, bytes received and SQL statements run per
+poll. Requests go through the ASGI app in-process:
+
+    python -m benchmarks.conditional_get --rows 5000 --polls 500
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+
+from benchmarks.common import format_summary
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    database_url = args.database_url or (
+        f"sqlite+aiosqlite:///{tempfile.gettempdir()}/conditional_get.db"
+    )
+    os.environ["ASYNC_DATABASE_URL"] = database_url
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["DEBUG"] = "false"
+    os.environ["AGENT_WARMUP"] = "lazy"
+
+
+async def run(args: argparse.Namespace) -> None:
+    import httpx
+    from sqlalchemy import event, func, insert, select
+
+    from app.core.config import settings
+    from app.db.database import Base, async_engine, async_session
+    from app.main import app
+    from app.models.task import Task
+
+    # Compare against a full query per 200 (benchmarks.api_cache covers
+    # the response cache)
+    settings.api_cache_enabled = False
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_session() as db:
+        if await db.scalar(select(func.count(Task.id))) != args.rows:
+            await db.execute(Task.__table__.delete())
+            await db.execute(
+                insert(Task),
+                [
+                    {"title": f"task {i}", "description": "x" * 80}
+                    for i in range(args.rows)
+                ],
+            )
+            await db.commit()
+        task_id = await db.scalar(select(func.min(Task.id)))
+
+    statements = [0]
+
+    def count(*_args) -> None:
+        statements[0] += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://benchmark/api/v1"
+    )
+    async with client:
+        for path in [
+            f"/tasks?limit={args.limit}",
+            f"/tasks/{task_id}",
+            "/tasks/stats/summary",
+        ]:
+            etag = (await client.get(path)).headers["etag"]
+            for conditional in (False, True):
+                headers = {"If-None-Match": etag} if conditional else {}
+                latencies: List[float] = []
+                received = 0
+                statements[0] = 0
+                for _ in range(args.polls):
+                    start = time.perf_counter()
+                    response = await client.get(path, headers=headers)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    received += len(response.content)
+                label = f"{path.split('?')[0]} {'304' if conditional else '200'}"
+                print(
+                    f"{format_summary(label, latencies)}  "
+                    f"bytes/poll={received / args.polls:,.0f}  "
+                    f"sql/poll={statements[0] / args.polls:.1f}"
+                )
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--database-url", default="")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Measure REST latency on /api/v1/tasks while chat turns run over /ws.
+
+Run against a live server (with a real or scripted LLM):
+
+    python -m benchmarks.rest_latency_under_chat --chat-turns 8
+
+The script first samples GET /api/v1/tasks with no chat load, then repeats
+the sampling while ``--chat-turns`` WebSocket clients each send a chat
+message and wait for the agent reply. If LLM calls block the event loop the
+loaded p99 grows to roughly the length of a Gemini call.
+
+The default message matches no fast-path command, and each client numbers
+its copy, so no turn is answered by the reply cache or coalesced with
+another: every turn reaches the LLM (each client also has a fresh
+connection, so no conversation memory).
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+import httpx
+import websockets
+
+from benchmarks.common import format_summary
+
+
+async def sample_rest(
+    client: httpx.AsyncClient, url: str, stop: asyncio.Event, interval: float
+) -> List[float]:
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get(url)
+        response.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def chat_turn(ws_url: str, message: str) -> float:
+    async with websockets.connect(ws_url) as ws:
+        start = time.perf_counter()
+        await ws.send(
+            json.dumps({"type": "chat_message", "data": {"message": message}})
+        )
+        while True:
+            frame = json.loads(await ws.recv())
+            if frame.get("type") == "agent_response":
+                return (time.perf_counter() - start) * 1000
+
+
+async def run(args: argparse.Namespace) -> None:
+    rest_url = f"{args.base_url}/api/v1/tasks"
+
+    async with httpx.AsyncClient(timeout=60) as client:
+        # Baseline: REST latency with no chat traffic
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(
+            sample_rest(client, rest_url, stop, args.interval)
+        )
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        baseline = await sampler
+
+        # Loaded: REST latency while N chat turns are in flight
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(
+            sample_rest(client, rest_url, stop, args.interval)
+        )
+        turns = await asyncio.gather(
+            *(
+                chat_turn(args.ws_url, f"{args.message} ({i})")
+                for i in range(args.chat_turns)
+            )
+        )
+        stop.set()
+        loaded = await sampler
+
+    print(format_summary("REST idle", baseline))
+    print(format_summary(f"REST with {args.chat_turns} chat turns", loaded))
+    print(format_summary("chat turn", list(turns)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--ws-url", default="ws://localhost:8000/ws")
+    parser.add_argument("--chat-turns", type=int, default=8)
+    parser.add_argument(
+        "--message", default="which of my tasks should I work on first, and why?"
+    )
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument("--baseline-seconds", type=float, default=3.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Measure cold-start time: importing app.main and serving the first request.
+
+Each run uses a fresh interpreter, like a newly scheduled worker:
+
+    python -m benchmarks.startup_time --runs 5
+    python -m benchmarks.startup_time --serve --warmup lazy
+
+Import runs report the wall time of ``import app.main`` and the slowest
+modules from ``python -X importtime``. ``--serve`` starts uvicorn against a
+throwaway SQLite database and reports the time until /health answers, plus
+the phase timings the server recorded (``startup`` in /metrics).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.common import format_summary
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import app.main; "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+
+def child_environment(args: argparse.Namespace) -> Dict[str, str]:
+    database_url = args.database_url or (
+        f"sqlite+aiosqlite:///{tempfile.gettempdir()}/startup_bench.db"
+    )
+    return {
+        **os.environ,
+        "ASYNC_DATABASE_URL": database_url,
+        "AGENT_WARMUP": args.warmup,
+        "DB_CREATE_TABLES": "false" if args.skip_create_tables else "true",
+        "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "benchmark"),
+        "DEBUG": "false",
+    }
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int]]:
+    """(module, cumulative microseconds) for top-level ``-X importtime`` rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        depth = len(name) - len(name.lstrip())
+        rows.append((name.strip(), int(cumulative), depth))
+    if not rows:
+        return []
+    shallowest = min(depth for _, _, depth in rows)
+    return [(name, us) for name, us, depth in rows if depth <= shallowest + 2]
+
+
+def run_imports(args: argparse.Namespace) -> None:
+    env = child_environment(args)
+    durations = []
+    modules: List[Tuple[str, int]] = []
+    for _ in range(args.runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", IMPORT_SNIPPET],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        durations.append(float(completed.stdout.strip().splitlines()[-1]))
+        modules = parse_importtime(completed.stderr)
+
+    print(format_summary("import app.main", durations))
+    print("slowest imports (last run, cumulative):")
+    for name, us in sorted(modules, key=lambda row: row[1], reverse=True)[: args.top]:
+        print(f"  {us / 1000:9.1f}ms  {name}")
+
+
+def run_serve(args: argparse.Namespace) -> None:
+    env = child_environment(args)
+    url = f"http://127.0.0.1:{args.port}"
+    ready = []
+    report = {}
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "app.main:app",
+                "--port",
+                str(args.port),
+                "--log-level",
+                "warning",
+            ],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        try:
+            while True:
+                try:
+                    httpx.get(f"{url}/health", timeout=1).raise_for_status()
+                    break
+                except httpx.HTTPError:
+                    if server.poll() is not None:
+                        raise RuntimeError("server exited during startup")
+                    time.sleep(0.01)
+            ready.append((time.perf_counter() - start) * 1000)
+            if args.warmup == "background":
+                # Give the background build a chance to finish for the report
+                time.sleep(args.settle)
+            report = httpx.get(f"{url}/metrics").json()["startup"]
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"warmup={args.warmup} create_tables={not args.skip_create_tables}")
+    print(format_summary("spawn to first /health", ready))
+    print("server phases (last run):", json.dumps(report, sort_keys=True))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument(
+        "--warmup", choices=("background", "eager", "lazy"), default="background"
+    )
+    parser.add_argument("--skip-create-tables", action="store_true")
+    parser.add_argument("--settle", type=float, default=5.0)
+    parser.add_argument("--database-url", default="")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    if args.serve:
+        run_serve(args)
+    else:
+        run_imports(args)
+
+
+if __name__ == "__main__":
+    main()
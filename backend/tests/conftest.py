@@ -0,0 +1,72 @@
+"""
+Shared fixtures: the app runs against a throwaway SQLite database with the
+in-process cache, so the suite needs neither Postgres, Redis nor an LLM.
+"""
+
+import asyncio
+import os
+import tempfile
+
+# Read by app.core.config at import, so set before any app module is loaded
+_database = os.path.join(tempfile.mkdtemp(prefix="task-tests-"), "tasks.db")
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_database}"
+os.environ["GEMINI_API_KEY"] = "test"
+os.environ["DEBUG"] = "false"
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["AGENT_WARMUP"] = "lazy"
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from app.core.task_version import bump_task_version  # noqa: E402
+from app.db.database import Base, async_engine, async_session  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    # One loop for the whole run: the engine's pooled connections outlive a test
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.run_until_complete(async_engine.dispose())
+    loop.close()
+
+
+@pytest.fixture(autouse=True)
+async def database():
+    """Empty tables for every test."""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    # Responses cached by earlier tests belong to the old tables
+    await bump_task_version()
+    yield
+
+
+@pytest.fixture
+async def client():
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test/api/v1"
+    ) as client:
+        yield client
+
+
+@pytest.fixture
+async def session():
+    async with async_session() as session:
+        yield session
+
+
+@pytest.fixture
+def create_tasks(client):
+    """Create tasks through the API; returns their ids in creation order."""
+
+    async def create(*tasks):
+        ids = []
+        for task in tasks:
+            response = await client.post("/tasks", json=task)
+            assert response.status_code == 200, response.text
+            ids.append(response.json()["id"])
+        return ids
+
+    return create
@@ -0,0 +1,87 @@
+async def _titles(client):
+    return sorted(task["title"] for task in (await client.get("/tasks")).json())
+
+
+async def test_bulk_update_by_filter(client, create_tasks):
+    await create_tasks(
+        {"title": "Write report", "priority": "high"},
+        {"title": "Review report", "priority": "low"},
+        {"title": "Buy milk", "priority": "high"},
+    )
+
+    response = await client.patch(
+        "/tasks/bulk",
+        json={"filter": {"priority": "high"}, "changes": {"status": "done"}},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+    done = await client.get("/tasks", params={"status": "done"})
+    assert sorted(task["title"] for task in done.json()) == ["Buy milk", "Write report"]
+
+
+async def test_bulk_update_combines_ids_and_filter(client, create_tasks):
+    ids = await create_tasks(
+        {"title": "Write report", "priority": "high"},
+        {"title": "Review report", "priority": "low"},
+        {"title": "Buy milk", "priority": "high"},
+    )
+
+    response = await client.patch(
+        "/tasks/bulk",
+        json={
+            "ids": ids[:2],
+            "filter": {"priority": "high"},
+            "changes": {"priority": "urgent"},
+        },
+    )
+
+    assert [task["id"] for task in response.json()["tasks"]] == ids[:1]
+    # The id left out by the filter is reported, not silently dropped
+    assert [error["id"] for error in response.json()["errors"]] == ids[1:2]
+
+
+async def test_bulk_delete_by_search(client, create_tasks):
+    await create_tasks(
+        {"title": "Write report"},
+        {"title": "Call Bob", "description": "about the report"},
+        {"title": "Buy milk"},
+    )
+
+    response = await client.request(
+        "DELETE", "/tasks/bulk", json={"filter": {"search": "report"}}
+    )
+
+    assert response.json()["count"] == 2
+    assert await _titles(client) == ["Buy milk"]
+
+
+async def test_bulk_delete_needs_a_selection(client, create_tasks):
+    await create_tasks({"title": "Write report"})
+
+    response = await client.request("DELETE", "/tasks/bulk", json={})
+
+    assert response.status_code == 400
+    assert await _titles(client) == ["Write report"]
+
+
+async def test_search_without_words_matches_nothing(client, create_tasks):
+    await create_tasks({"title": "Write report"}, {"title": "Buy milk"})
+
+    listed = await client.get("/tasks", params={"search": "!!!"})
+    deleted = await client.request(
+        "DELETE", "/tasks/bulk", json={"filter": {"search": "!!!"}}
+    )
+
+    assert listed.json() == []
+    assert deleted.json()["count"] == 0
+    assert await _titles(client) == ["Buy milk", "Write report"]
+
+
+async def test_bulk_delete_all_tasks(client, create_tasks):
+    await create_tasks({"title": "Write report"}, {"title": "Buy milk"})
+
+    response = await client.request("DELETE", "/tasks/bulk", json={"all_tasks": True})
+
+    assert response.json()["count"] == 2
+    assert await _titles(client) == []
@@ -0,0 +1,81 @@
+async def test_task_list_not_modified(client, create_tasks):
+    await create_tasks({"title": "Write report"})
+
+    first = await client.get("/tasks")
+    etag = first.headers["ETag"]
+    repeat = await client.get("/tasks", headers={"If-None-Match": etag})
+    weak = await client.get("/tasks", headers={"If-None-Match": f"W/{etag}"})
+
+    assert repeat.status_code == 304
+    assert repeat.headers["ETag"] == etag
+    assert repeat.content == b""
+    assert weak.status_code == 304
+
+
+async def test_write_changes_the_etag(client, create_tasks):
+    await create_tasks({"title": "Write report"})
+    etag = (await client.get("/tasks")).headers["ETag"]
+
+    await create_tasks({"title": "Buy milk"})
+    response = await client.get("/tasks", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 2
+
+
+async def test_single_task_and_wildcard(client, create_tasks):
+    [task_id] = await create_tasks({"title": "Write report"})
+    etag = (await client.get(f"/tasks/{task_id}")).headers["ETag"]
+
+    cached = await client.get(f"/tasks/{task_id}", headers={"If-None-Match": etag})
+    wildcard = await client.get(f"/tasks/{task_id}", headers={"If-None-Match": "*"})
+    missing = await client.get("/tasks/999", headers={"If-None-Match": "*"})
+
+    assert cached.status_code == 304
+    assert wildcard.status_code == 304
+    assert missing.status_code == 404
+
+
+async def test_stats_not_modified(client, create_tasks):
+    await create_tasks({"title": "Write report"})
+    etag = (await client.get("/tasks/stats/summary")).headers["ETag"]
+
+    response = await client.get("/tasks/stats/summary", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+
+
+async def test_stale_if_match_is_refused(client, create_tasks):
+    [task_id, other_id] = await create_tasks(
+        {"title": "Write report"}, {"title": "Buy milk"}
+    )
+    stale = (await client.get(f"/tasks/{task_id}")).headers["ETag"]
+    await client.put(f"/tasks/{other_id}", json={"priority": "high"})
+
+    update = await client.put(
+        f"/tasks/{task_id}", json={"status": "done"}, headers={"If-Match": stale}
+    )
+    delete = await client.delete(f"/tasks/{task_id}", headers={"If-Match": stale})
+
+    assert update.status_code == 412
+    assert delete.status_code == 412
+    task = (await client.get(f"/tasks/{task_id}")).json()
+    assert task["status"] == "pending"
+
+
+async def test_current_if_match_is_accepted(client, create_tasks):
+    [task_id] = await create_tasks({"title": "Write report"})
+    etag = (await client.get(f"/tasks/{task_id}")).headers["ETag"]
+
+    update = await client.put(
+        f"/tasks/{task_id}", json={"status": "done"}, headers={"If-Match": etag}
+    )
+    weak = await client.delete(f"/tasks/{task_id}", headers={"If-Match": f"W/{etag}"})
+    wildcard = await client.delete(f"/tasks/{task_id}", headers={"If-Match": "*"})
+
+    assert update.status_code == 200
+    assert update.json()["status"] == "done"
+    # If-Match compares strongly, so a weak tag never matches
+    assert weak.status_code == 412
+    assert wildcard.status_code == 200
@@ -0,0 +1,81 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    decode_ranked_cursor,
+    encode_cursor,
+    encode_ranked_cursor,
+)
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 9, 30, 15, 123456)
+    cursor = encode_cursor(SimpleNamespace(created_at=created_at, id=42))
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+def test_ranked_cursor_round_trip():
+    assert decode_ranked_cursor(encode_ranked_cursor(0.25, 7)) == (0.25, 7)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "bnVsbA", "WzEsMl0"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+    with pytest.raises(InvalidCursor):
+        decode_ranked_cursor(cursor)
+
+
+async def test_cursor_pages_cover_every_task_once(client, create_tasks):
+    ids = await create_tasks(*({"title": f"Task {i}"} for i in range(7)))
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/tasks", params=params)
+        assert response.status_code == 200
+        seen += [task["id"] for task in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    # Same created_at second for all of them: id breaks the tie, newest first
+    assert seen == sorted(ids, reverse=True)
+
+
+async def test_ranked_search_pages(client, create_tasks):
+    await create_tasks(
+        {"title": "Report draft"},
+        {"title": "Call Bob", "description": "about the report"},
+        {"title": "Report review"},
+        {"title": "Buy milk"},
+    )
+
+    first = await client.get("/tasks", params={"search": "report", "limit": 2})
+    second = await client.get(
+        "/tasks",
+        params={
+            "search": "report",
+            "limit": 2,
+            "cursor": first.headers["X-Next-Cursor"],
+        },
+    )
+
+    titles = [task["title"] for task in first.json() + second.json()]
+    # Title matches rank above description-only matches
+    assert sorted(titles[:2]) == ["Report draft", "Report review"]
+    assert titles[2:] == ["Call Bob"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+async def test_invalid_cursor_is_rejected(client):
+    response = await client.get("/tasks", params={"cursor": "garbage"})
+    assert response.status_code == 400
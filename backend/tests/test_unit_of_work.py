@@ -0,0 +1,108 @@
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.agents.llm import ScriptedChatModel
+from app.agents.task_agent import TaskManagementAgent
+from app.core.config import settings
+from app.core.task_version import get_task_version
+from app.db.unit_of_work import commit_task_write, task_session, unit_of_work
+from app.models.task import Task
+
+
+async def _task_titles(session):
+    return sorted((await session.scalars(select(Task.title))).all())
+
+
+async def _add_task(title):
+    async with task_session() as session:
+        await session.execute(insert(Task).values(title=title))
+        await commit_task_write(session)
+
+
+async def test_writes_commit_together(session):
+    version = await get_task_version()
+
+    async with unit_of_work() as uow:
+        await _add_task("Write report")
+        await _add_task("Buy milk")
+        assert await session.scalar(select(func.count(Task.id))) == 0
+        assert await uow.complete()
+
+    assert await _task_titles(session) == ["Buy milk", "Write report"]
+    assert await get_task_version() == version + 1
+
+
+async def test_failed_step_rolls_back_the_turn(session):
+    version = await get_task_version()
+
+    async with unit_of_work() as uow:
+        await _add_task("Write report")
+        with pytest.raises(ValueError):
+            async with task_session():
+                raise ValueError("tool failed")
+        # Later steps of the turn are refused
+        with pytest.raises(RuntimeError):
+            await _add_task("Buy milk")
+        assert not await uow.complete()
+
+    assert await _task_titles(session) == []
+    assert await get_task_version() == version
+
+
+async def test_unfinished_turn_is_discarded(session):
+    async with unit_of_work():
+        await _add_task("Write report")
+
+    assert await _task_titles(session) == []
+
+
+async def test_without_unit_of_work_each_write_commits(session):
+    await _add_task("Write report")
+
+    assert await _task_titles(session) == ["Write report"]
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    # Straight to the graph, with no cached or coalesced replies
+    monkeypatch.setattr(settings, "fast_path_enabled", False)
+    monkeypatch.setattr(settings, "agent_response_cache_enabled", False)
+    monkeypatch.setattr(settings, "agent_coalesce_enabled", False)
+    llm = ScriptedChatModel(
+        script=[
+            {
+                "match": "plan the launch",
+                "tool_calls": [
+                    {"name": "create_task", "args": {"title": "Book venue"}},
+                    {"name": "create_task", "args": {"title": "Send invites"}},
+                ],
+                "reply": "Added both tasks.",
+            },
+            {
+                "match": "finish task 999",
+                "tool_calls": [
+                    {"name": "create_task", "args": {"title": "Write report"}},
+                    {
+                        "name": "update_task",
+                        "args": {"task_identifier": "999", "status": "done"},
+                    },
+                ],
+                "reply": "Done.",
+            },
+        ]
+    )
+    return TaskManagementAgent(llm=llm)
+
+
+async def test_agent_turn_commits_its_writes(agent, session):
+    result = await agent.process_message("Plan the launch")
+
+    assert result["success"]
+    assert await _task_titles(session) == ["Book venue", "Send invites"]
+
+
+async def test_agent_turn_with_failed_write_is_rolled_back(agent, session):
+    await agent.process_message("Add a report and finish task 999")
+
+    # update_task found no task 999, so the task created with it is undone
+    assert await _task_titles(session) == []
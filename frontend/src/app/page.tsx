@@ -26,6 +26,9 @@ export default function Home() {
       // Forward agent responses to chat interface
       if (
         message.type === "agent_response" ||
+        message.type === "agent_response_chunk" ||
+        message.type === "agent_queued" ||
+        message.type === "agent_busy" ||
         message.type === "typing_indicator"
       ) {
         if (
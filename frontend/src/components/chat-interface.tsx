@@ -256,6 +256,7 @@ interface ChatMessage {
   content: string;
   timestamp: Date;
   isLoading?: boolean;
+  isStreaming?: boolean;
 }
 
 interface ChatInterfaceProps {
@@ -286,9 +287,11 @@ export function ChatInterface({
       console.log("ChatInterface received message:", message);
 
       if (message.type === "agent_response") {
-        // Remove loading message and add agent response
+        // Replace loading/streamed message with the final agent response
         setMessages((prev) => {
-          const filtered = prev.filter((msg) => !msg.isLoading);
+          const filtered = prev.filter(
+            (msg) => !msg.isLoading && !msg.isStreaming
+          );
           return [
             ...filtered,
             {
@@ -300,6 +303,48 @@ export function ChatInterface({
           ];
         });
         setIsTyping(false);
+      } else if (message.type === "agent_response_chunk") {
+        // Append streamed tokens to the in-progress agent message
+        setMessages((prev) => {
+          const filtered = prev.filter((msg) => !msg.isLoading);
+          const last = filtered[filtered.length - 1];
+          if (last?.isStreaming) {
+            return [
+              ...filtered.slice(0, -1),
+              { ...last, content: last.content + message.data.delta },
+            ];
+          }
+          return [
+            ...filtered,
+            {
+              id: Date.now().toString(),
+              type: "agent",
+              content: message.data.delta,
+              timestamp: new Date(),
+              isStreaming: true,
+            },
+          ];
+        });
+        setIsTyping(false);
+      } else if (message.type === "agent_queued") {
+        // Show the queue position in the loading placeholder
+        setMessages((prev) =>
+          prev.map((msg) =>
+            msg.isLoading ? { ...msg, content: message.data.message } : msg
+          )
+        );
+      } else if (message.type === "agent_busy") {
+        // Rejected by admission control; nothing else will follow
+        setMessages((prev) => [
+          ...prev.filter((msg) => !msg.isLoading),
+          {
+            id: Date.now().toString(),
+            type: "agent",
+            content: message.data.message,
+            timestamp: new Date(),
+          },
+        ]);
+        setIsTyping(false);
       } else if (message.type === "typing_indicator") {
         setIsTyping(message.data.typing);
       }